@@ -1,28 +1,80 @@
 from __future__ import annotations
-from fastapi import APIRouter, Query
-from app.api.schemas import SummaryOut, TimeseriesOut
-from app.services.analytics.pipeline import run_pipeline
+from typing import Dict, Literal, Union
+from fastapi import APIRouter, BackgroundTasks, Query
+from fastapi.responses import ORJSONResponse
+from app.api.schemas import DashboardOut, SummaryOut, TimeseriesColumnarOut, TimeseriesOut
+from app.services.analytics.evidence import timeseries_rows
+from app.services.analytics import snapshot_store
 
 router = APIRouter(prefix="/health", tags=["health"])
 
 
+def _pipeline_result(user_id: str, days_window: int, background: BackgroundTasks) -> Dict:
+    """
+    Last-computed pipeline result shared by all routes. A stale snapshot is
+    served immediately and recomputed after the response is sent.
+    """
+    result, fresh = snapshot_store.get(user_id, days_window)
+    if result is None:
+        return snapshot_store.compute(user_id, days_window)
+    if not fresh:
+        background.add_task(snapshot_store.refresh, user_id, days_window)
+    return result
+
+
+Layout = Literal["columns", "rows"]
+
+
+def _timeseries_payload(user_id: str, days_window: int, result: Dict, layout: Layout) -> Dict:
+    # "rows" is the legacy one-object-per-day shape
+    if layout == "rows":
+        return {
+            "user_id": user_id,
+            "days_window": days_window,
+            "days": timeseries_rows(result["timeseries"]),
+        }
+    return {
+        "user_id": user_id,
+        "days_window": days_window,
+        "layout": "columns",
+        "columns": result["timeseries"],
+    }
+
+
 @router.get("/summary", response_model=SummaryOut)
 def get_summary(
+    background: BackgroundTasks,
     user_id: str = Query("user1"),
     days_window: int = Query(30, ge=7, le=365),
 ):
-    result = run_pipeline(user_id=user_id, days_window=days_window)
+    result = _pipeline_result(user_id, days_window, background)
     return result["summary"]
 
 
-@router.get("/timeseries", response_model=TimeseriesOut)
+@router.get("/timeseries", response_model=Union[TimeseriesColumnarOut, TimeseriesOut])
 def get_timeseries(
+    background: BackgroundTasks,
     user_id: str = Query("user1"),
     days_window: int = Query(30, ge=7, le=365),
+    layout: Layout = Query("columns"),
 ):
-    result = run_pipeline(user_id=user_id, days_window=days_window)
-    return {
-        "user_id": user_id,
-        "days_window": days_window,
-        "days": result["timeseries"],
-    }
+    result = _pipeline_result(user_id, days_window, background)
+    # Pipeline output is trusted; skip per-day response validation
+    return ORJSONResponse(_timeseries_payload(user_id, days_window, result, layout))
+
+
+@router.get("/dashboard", response_model=DashboardOut)
+def get_dashboard(
+    background: BackgroundTasks,
+    user_id: str = Query("user1"),
+    days_window: int = Query(30, ge=7, le=365),
+    layout: Layout = Query("columns"),
+):
+    """Summary and timeseries from a single pipeline run (one round-trip)."""
+    result = _pipeline_result(user_id, days_window, background)
+    return ORJSONResponse(
+        {
+            "summary": result["summary"],
+            "timeseries": _timeseries_payload(user_id, days_window, result, layout),
+        }
+    )
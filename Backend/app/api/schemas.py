@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional, Union
 from pydantic import BaseModel, Field
 
 
@@ -50,3 +50,30 @@ class TimeseriesOut(BaseModel):
     user_id: str
     days_window: int
     days: List[TimeseriesDayOut]
+
+
+class TimeseriesColumnsOut(BaseModel):
+    date: List[str]
+    recovery_value: List[Optional[float]]
+    sleep_duration: List[Optional[float]]
+    sleep_consistency: List[Optional[float]]
+    excercise_data_point: List[Optional[float]]
+    nutrition_data_point: List[Optional[float]]
+
+    is_dip: List[bool]
+    dip_kind: List[str]
+
+    factor_abnormal: Dict[str, List[bool]]
+    factor_abs_z: Dict[str, List[float]]
+
+
+class TimeseriesColumnarOut(BaseModel):
+    user_id: str
+    days_window: int
+    layout: Literal["columns"] = "columns"
+    columns: TimeseriesColumnsOut
+
+
+class DashboardOut(BaseModel):
+    summary: SummaryOut
+    timeseries: Union[TimeseriesColumnarOut, TimeseriesOut]
@@ -6,7 +6,9 @@ from dataclasses import dataclass
 from datetime import date
 from typing import Optional, Dict
 
-@dataclass
+# Frozen: the store caches parsed records and hands the same instances to
+# every caller, so they must not be modified in place
+@dataclass(frozen=True, slots=True)
 class DailyRecord:
     date: date
 
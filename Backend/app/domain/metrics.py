@@ -0,0 +1,82 @@
+"""
+Metric fields of a DailyRecord and their canonical column layout.
+
+Shared by storage (which keeps a columnar copy of each user's records)
+and the analytics stages (which z-score those columns).
+"""
+
+from __future__ import annotations
+
+from operator import attrgetter
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.domain.daily_record import DailyRecord
+
+
+# Canonical column order for matrix-shaped metric data
+METRIC_KEYS: Tuple[str, ...] = (
+    "recovery_value",
+    "sleep_duration",
+    "sleep_consistency",
+    "excercise_data_point",
+    "nutrition_data_point",
+)
+METRIC_INDEX: Dict[str, int] = {key: i for i, key in enumerate(METRIC_KEYS)}
+
+
+# Explicit key -> accessor map to avoid magic getattr mistakes
+_GETTERS: Dict[str, Callable[[DailyRecord], Optional[float]]] = {
+    key: attrgetter(key) for key in METRIC_KEYS
+}
+
+
+def _metric_getter(key: str) -> Callable[[DailyRecord], Optional[float]]:
+    try:
+        return _GETTERS[key]
+    except KeyError:
+        raise ValueError(f"Unknown metric key: {key}") from None
+
+
+def metric_column(records: List[DailyRecord], key: str) -> np.ndarray:
+    """
+    Materialize one metric as a float64 array (np.nan where missing).
+    """
+    getter = _metric_getter(key)
+    values = (getter(r) for r in records)
+    return np.fromiter(
+        (np.nan if v is None else float(v) for v in values),
+        dtype=np.float64,
+        count=len(records),
+    )
+
+
+def _row_getter(keys: Tuple[str, ...]) -> Callable[[DailyRecord], Tuple[Optional[float], ...]]:
+    """One precompiled accessor returning all `keys` of a record as a tuple."""
+    getters = [_metric_getter(key) for key in keys]  # validates every key
+    if len(getters) == 1:
+        (getter,) = getters
+        return lambda r: (getter(r),)
+    if not getters:
+        return lambda r: ()
+    return attrgetter(*keys)
+
+
+# All METRIC_KEYS of a record as a tuple, in column order
+metric_row = _row_getter(METRIC_KEYS)
+
+
+def records_to_matrix(
+    records: List[DailyRecord],
+    keys: Tuple[str, ...] = METRIC_KEYS,
+) -> np.ndarray:
+    """
+    Struct-of-arrays view of the records: one float64 row per record and
+    one column per key (np.nan where missing). Built in a single pass.
+    """
+    get_row = metric_row if keys is METRIC_KEYS else _row_getter(keys)
+    if not records:
+        return np.empty((0, len(keys)), dtype=np.float64)
+    # One C-level attribute fetch per record; NumPy maps None to NaN for float64
+    return np.array([get_row(r) for r in records], dtype=np.float64).reshape(len(records), len(keys))
@@ -0,0 +1,78 @@
+"""
+Small numeric kernels shared across analytics stages.
+
+Each kernel is a plain loop over float64 arrays so numba can compile it;
+when numba is not installed the same function runs as regular Python.
+
+Every JIT kernel in the package is built through jit_or, which falls back
+to a plain implementation without numba and warms the kernel up at import
+so the first request does not pay for compilation. Compiled code is cached on disk (cache=True);
+point NUMBA_CACHE_DIR at a persistent path in deployments so the cache
+survives container rebuilds.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+try:  # Optional JIT; the plain-Python loop is used without it
+    from numba import njit
+except ImportError:  # pragma: no cover - depends on environment
+    njit = None
+
+
+def warm_up(kernel: Callable, *args) -> None:
+    """
+    Call a JIT kernel once with representative arguments so numba compiles
+    (or loads from its cache) that specialization now. No-op without numba.
+    """
+    if njit is None:
+        return
+    try:
+        kernel(*args)
+    except Exception:  # best effort: a real call will surface the error
+        pass
+
+
+def jit_or(
+    loop: Callable,
+    fallback: Optional[Callable] = None,
+    warm_args: Optional[tuple] = None,
+) -> Callable:
+    """
+    Compile `loop` with numba when it is installed, else return `fallback`
+    (default: `loop` itself, run as plain Python). When `warm_args` is
+    given the compiled kernel is warmed up with them right away.
+    """
+    if njit is None:
+        return loop if fallback is None else fallback
+    kernel = njit(cache=True)(loop)
+    if warm_args is not None:
+        warm_up(kernel, *warm_args)
+    return kernel
+
+
+def _welford_loop(xs: np.ndarray) -> Tuple[float, float, int]:
+    """
+    Single-pass population mean/std (Welford), skipping NaN.
+    Returns (mean, std, n); mean/std are NaN when n == 0.
+    """
+    n = 0
+    mean = 0.0
+    m2 = 0.0  # sum of squared deviations from the running mean
+    for i in range(len(xs)):
+        x = xs[i]
+        if x != x:
+            continue
+        n += 1
+        delta = x - mean
+        mean += delta / n
+        m2 += delta * (x - mean)
+    if n == 0:
+        return (np.nan, np.nan, 0)
+    return (mean, np.sqrt(m2 / n), n)
+
+
+welford = jit_or(_welford_loop, warm_args=(np.zeros(2),))
@@ -1,43 +1,76 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
 from math import sqrt
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
 
 from app.domain.daily_record import DailyRecord
+from app.domain.metrics import METRIC_INDEX, METRIC_KEYS, metric_column, records_to_matrix
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BaselineStats:
     mean: Optional[float]
     std: Optional[float]
     n: int  # number of non-null observations used
 
 
-def _mean(xs: List[float]) -> float:
-    return sum(xs) / len(xs)
-
+class RollingStats:
+    """
+    Running population mean/std over a sliding window (Welford updates).
 
-def _std(xs: List[float], mu: float) -> float:
-    # Population std 
-    if len(xs) == 0:
-        return 0.0
-    var = sum((x - mu) ** 2 for x in xs) / len(xs)
-    return sqrt(var)
+    push() adds the day entering the window, pop() removes the day leaving
+    it; both are O(1). Missing values (None/NaN) are ignored on both sides,
+    so callers can push/pop records symmetrically.
 
+    Exposes the same mean/std/n read interface as BaselineStats, so it can
+    be handed to consumers such as insights._stability_from_std directly.
+    """
 
-def _get_metric_value(r: DailyRecord, key: str) -> Optional[float]:
-    # Map is explicit to avoid magic getattr mistakes
-    if key == "recovery_value":
-        return r.recovery_value
-    if key == "sleep_duration":
-        return r.sleep_duration
-    if key == "sleep_consistency":
-        return r.sleep_consistency
-    if key == "excercise_data_point":
-        return r.excercise_data_point
-    if key == "nutrition_data_point":
-        return r.nutrition_data_point
-    raise ValueError(f"Unknown metric key: {key}")
+    __slots__ = ("n", "_mean", "_m2")
+
+    def __init__(self) -> None:
+        self.n = 0
+        self._mean = 0.0
+        self._m2 = 0.0  # sum of squared deviations from the mean
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self._mean if self.n > 0 else None
+
+    @property
+    def std(self) -> Optional[float]:
+        if self.n == 0:
+            return None
+        return sqrt(self._m2 / self.n)
+
+    def push(self, x: Optional[float]) -> None:
+        if x is None or x != x:
+            return
+        x = float(x)
+        self.n += 1
+        delta = x - self._mean
+        self._mean += delta / self.n
+        self._m2 += delta * (x - self._mean)
+
+    def pop(self, x: Optional[float]) -> None:
+        if x is None or x != x:
+            return
+        if self.n <= 1:
+            self.n, self._mean, self._m2 = 0, 0.0, 0.0
+            return
+        x = float(x)
+        self.n -= 1
+        delta = x - self._mean
+        self._mean -= delta / self.n
+        self._m2 -= delta * (x - self._mean)
+        if self._m2 < 0.0:
+            # Guard against tiny negative drift from cancellation
+            self._m2 = 0.0
+
+    def stats(self) -> BaselineStats:
+        return BaselineStats(mean=self.mean, std=self.std, n=self.n)
 
 
 def compute_individual_baselines(
@@ -58,42 +91,62 @@ def compute_individual_baselines(
         raise ValueError("days_window must be > 0")
 
     window = records[-days_window:] if len(records) >= days_window else records
-    xs: List[float] = []
-    for r in window:
-        v = _get_metric_value(r, metric_key)
-        if v is None:
-            continue
-        xs.append(float(v))
+    xs = metric_column(window, metric_key)
 
-    if len(xs) == 0:
+    n = int(np.count_nonzero(~np.isnan(xs)))
+    if n == 0:
         return BaselineStats(mean=None, std=None, n=0)
 
-    mu = _mean(xs)
-    sd = _std(xs, mu)
-    return BaselineStats(mean=mu, std=sd, n=len(xs))
+    # Population std (ddof=0)
+    mu = float(np.nanmean(xs))
+    sd = float(np.nanstd(xs))
+    return BaselineStats(mean=mu, std=sd, n=n)
 
 
 def compute_cumulative_baselines(
     records: List[DailyRecord],
     days_window: int,
     metric_keys: Optional[List[str]] = None,
+    matrix: Optional[np.ndarray] = None,
     ) -> Dict[str, BaselineStats]:
     """
     Compute baseline stats for multiple metrics over the same window.
     Returns a dict keyed by metric name -> BaselineStats.
+
+    `matrix` may carry records_to_matrix(records, keys) when the caller
+    already built it, so the records are not walked again.
     """
-    if metric_keys is None:
-        metric_keys = [
-            "recovery_value",
-            "sleep_duration",
-            "sleep_consistency",
-            "excercise_data_point",
-            "nutrition_data_point",
-        ]
+    if days_window <= 0:
+        raise ValueError("days_window must be > 0")
+
+    keys = METRIC_KEYS if metric_keys is None else tuple(metric_keys)
+    if matrix is None:
+        window = records[-days_window:] if len(records) >= days_window else records
+        m = records_to_matrix(window, keys)
+    else:
+        m = matrix[-days_window:]
+    return baselines_from_matrix(m, keys)
+
+
+def baselines_from_matrix(
+    m: np.ndarray,
+    keys: Tuple[str, ...] = METRIC_KEYS,
+) -> Dict[str, BaselineStats]:
+    """Column-wise population baselines over every row of `m` (NaN = missing)."""
+    present = ~np.isnan(m)
+    ns = present.sum(axis=0)
+    safe_ns = np.where(ns > 0, ns, 1)
+    means = np.where(present, m, 0.0).sum(axis=0) / safe_ns
+    sq_dev = np.where(present, (m - means) ** 2, 0.0)
+    stds = np.sqrt(sq_dev.sum(axis=0) / safe_ns)
 
     baselines: Dict[str, BaselineStats] = {}
-    for key in metric_keys:
-        baselines[key] = compute_individual_baselines(records, key, days_window)
+    for j, key in enumerate(keys):
+        n = int(ns[j])
+        if n == 0:
+            baselines[key] = BaselineStats(mean=None, std=None, n=0)
+        else:
+            baselines[key] = BaselineStats(mean=float(means[j]), std=float(stds[j]), n=n)
     return baselines
 
 
@@ -108,3 +161,71 @@ def z_score(value: float, baseline: BaselineStats) -> Optional[float]:
         # If no variance, z-score isn't meaningful unless it's exactly the mean.
         return 0.0 if value == baseline.mean else None
     return (value - baseline.mean) / baseline.std
+
+
+def z_score_array(values: np.ndarray, baseline: BaselineStats) -> np.ndarray:
+    """
+    Vectorized z_score for one metric column. np.nan where z_score would
+    return None (missing value, missing baseline, zero variance off the mean).
+    """
+    if baseline.mean is None or baseline.std is None or baseline.n == 0:
+        return np.full(values.shape, np.nan)
+    if baseline.std == 0:
+        return np.where(values == baseline.mean, 0.0, np.nan)
+    return (values - baseline.mean) / baseline.std
+
+
+@dataclass(frozen=True, slots=True)
+class BaselinePack:
+    """
+    Baselines resolved into column arrays aligned with `keys`, so stages
+    that z-score whole matrices skip the per-key dict lookups and the
+    1/std division. Build once per run with pack_baselines().
+    """
+    keys: Tuple[str, ...]
+    mean: np.ndarray     # np.nan where the baseline is missing
+    inv_std: np.ndarray  # 1/std; 0.0 for zero-variance baselines, np.nan where missing
+    field_index: Dict[str, int]
+
+
+def pack_baselines(
+    baselines: Dict[str, BaselineStats],
+    keys: Tuple[str, ...] = METRIC_KEYS,
+) -> BaselinePack:
+    means = np.full(len(keys), np.nan)
+    inv_stds = np.full(len(keys), np.nan)
+    for j, key in enumerate(keys):
+        b = baselines.get(key)
+        if b is None or b.mean is None or b.std is None or b.n == 0:
+            continue
+        means[j] = b.mean
+        inv_stds[j] = 1.0 / b.std if b.std > 0 else 0.0
+    field_index = METRIC_INDEX if keys is METRIC_KEYS else {key: j for j, key in enumerate(keys)}
+    return BaselinePack(keys=keys, mean=means, inv_std=inv_stds, field_index=field_index)
+
+
+# Either form is accepted wherever whole matrices are z-scored
+BaselineSource = Union[Dict[str, BaselineStats], BaselinePack]
+
+
+def z_score_matrix(
+    matrix: np.ndarray,
+    baselines: BaselineSource,
+    keys: Tuple[str, ...] = METRIC_KEYS,
+) -> np.ndarray:
+    """
+    Vectorized z_score over a records matrix (columns ordered by `keys`).
+    Cells where z_score would return None are np.nan.
+
+    `baselines` may be a BaselinePack already built for `keys`.
+    """
+    pack = baselines if isinstance(baselines, BaselinePack) else pack_baselines(baselines, keys)
+    if pack.keys != keys:
+        raise ValueError("BaselinePack keys do not match matrix columns")
+
+    with np.errstate(invalid="ignore"):
+        dev = matrix - pack.mean
+        z = dev * pack.inv_std
+        # Zero-variance baselines: 0.0 only when exactly at the mean
+        z = np.where(pack.inv_std == 0, np.where(dev == 0, 0.0, np.nan), z)
+    return z
@@ -14,16 +14,29 @@ This module returns dip events that downstream attribution can attempt to explai
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date
-from typing import List, Optional
+from operator import attrgetter
+from typing import Dict, List, Optional
+
+import numpy as np
 
 from app.domain.daily_record import DailyRecord
 from app.domain.config import AnalysisAssumptions 
-from app.services.analytics.baselines import BaselineStats, z_score
+from app.services.analytics.baselines import METRIC_INDEX, BaselineStats, metric_column, z_score_array
+from app.services.analytics._kernels import jit_or
 
 
-@dataclass(frozen=True)
+# Per-day kind codes produced by the dip scan
+KIND_NONE = 0
+KIND_LARGE = 1
+KIND_PERSISTENT = 2
+_KIND_NAMES = {KIND_LARGE: "large", KIND_PERSISTENT: "persistent"}
+
+_BY_DATE = attrgetter("date")
+
+
+@dataclass(frozen=True, slots=True)
 class DipEvent:
     date: date
     recovery_value: float
@@ -36,7 +49,33 @@ class DipEvent:
 class DipDetectionResult:
     large: List[DipEvent]
     persistent: List[DipEvent]
-    all: List[DipEvent] # no duplications and large preference
+    # no duplications and large preference; chronological large + persistent when omitted
+    all: Optional[List[DipEvent]] = None
+    kind_by_date: Dict[date, str] = field(default_factory=dict)  # built once, large preferred
+
+    def __post_init__(self) -> None:
+        if self.all is None:
+            # The kinds are disjoint by date, so a sort by date is the merge
+            object.__setattr__(self, "all", sorted(self.large + self.persistent, key=_BY_DATE))
+        if self.kind_by_date or not (self.large or self.persistent):
+            return
+        kinds: Dict[date, str] = {d.date: "persistent" for d in self.persistent}
+        kinds.update((d.date, "large") for d in self.large)
+        object.__setattr__(self, "kind_by_date", kinds)
+
+    @classmethod
+    def from_events(cls, events: List[DipEvent]) -> "DipDetectionResult":
+        """
+        Split detect_recovery_dips() output by kind. `events` is already
+        deduplicated by date (large preferred), so it is kept as `all`
+        itself (not copied); callers hand over ownership of the list.
+        """
+        return cls(
+            large=[d for d in events if d.kind == "large"],
+            persistent=[d for d in events if d.kind == "persistent"],
+            all=events,
+            kind_by_date={d.date: d.kind for d in events},
+        )
 
 @dataclass(frozen=True)
 class DipThresholds:
@@ -45,15 +84,103 @@ class DipThresholds:
     persistent_days: int = 2
 
 
+def _scan_dip_kinds_loop(
+    z: np.ndarray,
+    large_z: float,
+    persistent_z: float,
+    persistent_days: int,
+) -> np.ndarray:
+    """
+    Single pass over per-day z-scores (np.nan = missing/unscorable).
+    Large days are marked immediately; a run of days at or below
+    `persistent_z` is back-filled as persistent once it closes, if long
+    enough. Large is never overwritten. Written so numba can compile it.
+    """
+    n = z.shape[0]
+    kinds = np.zeros(n, dtype=np.int8)
+    run_start = 0
+    run_len = 0
+    for i in range(n + 1):
+        # NaN compares False, which breaks a run like a missing day does
+        below = i < n and z[i] <= persistent_z
+        if i < n and z[i] <= large_z:
+            kinds[i] = KIND_LARGE
+        if below:
+            if run_len == 0:
+                run_start = i
+            run_len += 1
+            continue
+        if run_len >= persistent_days:
+            for j in range(run_start, run_start + run_len):
+                if kinds[j] == KIND_NONE:
+                    kinds[j] = KIND_PERSISTENT
+        run_len = 0
+    return kinds
+
+
+def _scan_dip_kinds_numpy(
+    z: np.ndarray,
+    large_z: float,
+    persistent_z: float,
+    persistent_days: int,
+) -> np.ndarray:
+    """Vectorized equivalent of _scan_dip_kinds_loop (run-length via edges)."""
+    n = z.shape[0]
+    kinds = np.zeros(n, dtype=np.int8)
+    below = z <= persistent_z
+
+    # Run boundaries: +1 where a run starts, -1 one past where it ends
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], below.view(np.int8), [0]))))
+    starts, ends = edges[::2], edges[1::2]
+    keep = (ends - starts) >= persistent_days
+    marks = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(marks, starts[keep], 1)
+    np.add.at(marks, ends[keep], -1)
+
+    kinds[np.cumsum(marks[:n]) > 0] = KIND_PERSISTENT
+    kinds[z <= large_z] = KIND_LARGE
+    return kinds
+
+
+_scan_dip_kinds = jit_or(
+    _scan_dip_kinds_loop, _scan_dip_kinds_numpy, warm_args=(np.zeros(2), -2.0, -1.0, 2)
+)
+
+
+def _one_row_per_date(
+    records: List[DailyRecord],
+    idx: np.ndarray,
+    kinds: np.ndarray,
+) -> np.ndarray:
+    """
+    Flagged rows `idx` reduced to one per date, in date order. A repeated
+    date keeps its first "large" row if it has one, else its first row.
+    """
+    if idx.size == 0:
+        return idx
+    ordinals = np.fromiter((records[i].date.toordinal() for i in idx.tolist()), dtype=np.int64, count=idx.size)
+    # Sort by date, then large before persistent, then row order; keep each date's head
+    order = np.lexsort((idx, kinds[idx] != KIND_LARGE, ordinals))
+    ordinals = ordinals[order]
+    head = np.empty(order.size, dtype=bool)
+    head[0] = True
+    np.not_equal(ordinals[1:], ordinals[:-1], out=head[1:])
+    return idx[order[head]]
+
+
 def detect_recovery_dips(
     records: List[DailyRecord],
     recovery_baseline: BaselineStats,
     constants: AnalysisAssumptions,
     thresholds: DipThresholds = DipThresholds(),
+    matrix: Optional[np.ndarray] = None,
 ) -> List[DipEvent]:
     """
     Detect recovery dips from a list of DailyRecord objects.
 
+    `matrix` may carry records_to_matrix(records) when the caller already
+    built it; the recovery column is then read from it.
+
     Returns:
     - A list of DipEvent, ordered by date, with duplicate dates removed
       (if a day is both "large" and part of a "persistent" run, it is labeled "large").
@@ -67,77 +194,34 @@ def detect_recovery_dips(
     if recovery_baseline.n < constants.min_observations:
         return []
 
-    # Compute per-day z-scores (None when not computable)
-    per_day: List[tuple[DailyRecord, Optional[float]]] = []
-    for r in records:
-        if r.recovery_value is None:
-            per_day.append((r, None))
-            continue
-        z = z_score(float(r.recovery_value), recovery_baseline)
-        per_day.append((r, z))
-
-    dips: List[DipEvent] = []
-
-    # Single day large dips
-    for r, z in per_day:
-        if z is None or r.recovery_value is None:
-            continue
-        if z <= thresholds.large_dip_z:
-            mu = float(recovery_baseline.mean)
-            rv = float(r.recovery_value)
-            dips.append(
-                DipEvent(
-                    date=r.date,
-                    recovery_value=rv,
-                    baseline_mean=mu,
-                    z=float(z),
-                    magnitude=mu - rv,
-                    kind="large",
-                )
-            )
-
-    # 2) Consecutive days below a threshold | persistent dips
-    run: List[DipEvent] = []
-    for r, z in per_day:
-        if z is None or r.recovery_value is None:
-            # break a run on missing/unscorable recovery
-            if len(run) >= thresholds.persistent_days:
-                dips.extend(run)
-            run = []
-            continue
-
-        if z <= thresholds.persistent_dip_z:
-            mu = float(recovery_baseline.mean)
-            rv = float(r.recovery_value)
-            run.append(
-                DipEvent(
-                    date=r.date,
-                    recovery_value=rv,
-                    baseline_mean=mu,
-                    z=float(z),
-                    magnitude=mu - rv,
-                    kind="persistent",
-                )
-            )
-        else:
-            # close run if long enough
-            if len(run) >= thresholds.persistent_days:
-                dips.extend(run)
-            run = []
-
-    # close trailing run
-    if len(run) >= thresholds.persistent_days:
-        dips.extend(run)
-
-    # Deduplicate by date: prefer "large" over "persistent" if both exist
-    by_date: dict[date, DipEvent] = {}
-    for d in dips:
-        existing = by_date.get(d.date)
-        if existing is None:
-            by_date[d.date] = d
-            continue
-        if existing.kind == "persistent" and d.kind == "large":
-            by_date[d.date] = d
-
-    # Return chronologically
-    return [by_date[k] for k in sorted(by_date.keys())]
\ No newline at end of file
+    mu = float(recovery_baseline.mean)
+
+    if matrix is None:
+        values = metric_column(records, "recovery_value")
+    else:
+        values = matrix[:, METRIC_INDEX["recovery_value"]]
+    z = z_score_array(values, recovery_baseline)
+    kinds = _scan_dip_kinds(
+        z,
+        float(thresholds.large_dip_z),
+        float(thresholds.persistent_dip_z),
+        int(thresholds.persistent_days),
+    )
+
+    # Only dip days become DipEvents; the scan labels each row (large preferred)
+    idx = _one_row_per_date(records, np.flatnonzero(kinds), kinds)
+    # Gather flagged rows in bulk so the loop only touches Python floats/ints
+    dips: List[DipEvent] = [
+        DipEvent(
+            date=records[i].date,
+            recovery_value=rv,
+            baseline_mean=mu,
+            z=zi,
+            magnitude=mu - rv,
+            kind=_KIND_NAMES[k],
+        )
+        for i, rv, zi, k in zip(idx.tolist(), values[idx].tolist(), z[idx].tolist(), kinds[idx].tolist())
+    ]
+
+    # Already chronological (see _one_row_per_date)
+    return dips
@@ -13,13 +13,16 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import date
 from typing import Dict, List, Optional
+
+import numpy as np
+
 from app.domain.daily_record import DailyRecord
-from app.services.analytics.baselines import BaselineStats, z_score
+from app.services.analytics.baselines import METRIC_KEYS, BaselineSource, records_to_matrix, z_score_matrix
 from app.services.analytics.dips import DipDetectionResult
-from app.services.analytics.pareto_calculation import DEFAULT_DRIVERS, AttributionThresholds, FactorConfig, ParetoResult
+from app.services.analytics.pareto_calculation import DEFAULT_DRIVERS, AttributionThresholds, ParetoResult, factor_strengths
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TimeseriesDay:
     date: date
     recovery_value: Optional[float]
@@ -35,89 +38,96 @@ class TimeseriesDay:
     factor_abs_z: Dict[str, float]    # {"sleep": 0.0.., "exercise": .., "nutrition": ..}
 
 
-def _safe_float(v) -> Optional[float]:
-    if v is None:
-        return None
-    try:
-        return float(v)
-    except (TypeError, ValueError):
-        return None
+# |z| is only displayed to 2 decimals; rounding keeps the payload short.
+# Abnormal flags are decided on the unrounded values.
+_ABS_Z_DECIMALS = 2
 
 
-def _factor_abs_z_for_day(
-    record: DailyRecord,
-    factor: FactorConfig,
-    baselines: Dict[str, BaselineStats],
-) -> Optional[float]:
+def _iso_dates(records: List[DailyRecord]) -> List[str]:
     """
-    Returns the factor's per-day strength as the maximum abs z-score among its fields.
-    Mirrors pareto logic.
+    ISO date strings for the records. When the window is gap-free (every
+    step is exactly one day, so no gaps or duplicates) the column is
+    generated with np.datetime64 arithmetic instead of per-row isoformat().
     """
-    best: Optional[float] = None
-    for field in factor.fields:
-        b = baselines.get(field)
-        if b is None:
-            continue
-        val = _safe_float(getattr(record, field, None))
-        if val is None:
-            continue
-        z = z_score(val, b)
-        if z is None:
-            continue
-        az = abs(float(z))
-        if best is None or az > best:
-            best = az
-    return best
+    if not records:
+        return []
+    ordinals = np.fromiter((r.date.toordinal() for r in records), dtype=np.int64, count=len(records))
+    if not np.all(np.diff(ordinals) == 1):
+        return [r.date.isoformat() for r in records]
+    days = np.datetime64(records[0].date, "D") + np.arange(len(records))
+    return days.astype("U10").tolist()
 
 
-def build_timeseries(
+def build_timeseries_columns(
     records: List[DailyRecord],
     dips_result: DipDetectionResult,
-    baselines: Dict[str, BaselineStats],
+    baselines: BaselineSource,
     pareto: Optional[ParetoResult] = None,
     thresholds: AttributionThresholds = AttributionThresholds(),
-) -> List[Dict]:
+    matrix: Optional[np.ndarray] = None,
+) -> Dict:
     """
-    Returns a list of dicts (JSON-ready) for easy API return.
+    Columnar (struct-of-arrays) timeseries: one JSON-ready list per field,
+    and one list per factor under "factor_abnormal" / "factor_abs_z".
 
     Note: `pareto` is optional; the timeseries stands on its own.
+    `matrix` may carry records_to_matrix(records) if already built.
     """
-    dip_kind_by_date: Dict[date, str] = {}
-    for d in dips_result.persistent:
-        dip_kind_by_date[d.date] = "persistent"
-    for d in dips_result.large:
-        dip_kind_by_date[d.date] = "large"  # overwrite persistent if both (large preferred)
-
+    dip_kind_by_date = dips_result.kind_by_date
+    kinds = [dip_kind_by_date.get(r.date, "none") for r in records]
+
+    m = records_to_matrix(records) if matrix is None else matrix
+    columns: Dict = {"date": _iso_dates(records)}
+    for j, key in enumerate(METRIC_KEYS):
+        # tolist() converts in C; NaN (missing) becomes None
+        columns[key] = [None if v != v else v for v in m[:, j].tolist()]
+    columns["is_dip"] = [k != "none" for k in kinds]
+    columns["dip_kind"] = kinds
+
+    # Per-factor strength for every day at once: max abs z among the factor's fields.
+    # Days with no scorable field get strength 0.0 and are never abnormal.
+    strengths = factor_strengths(np.abs(z_score_matrix(m, baselines)))
+    scored = ~np.isnan(strengths)
+    strengths = np.where(scored, strengths, 0.0)
+    abnormal = scored & (strengths >= thresholds.abnormal_abs_z)
+    rounded = np.round(strengths, _ABS_Z_DECIMALS)
+
+    factor_abnormal: Dict[str, List[bool]] = {}
+    factor_abs_z: Dict[str, List[float]] = {}
+    for j, factor in enumerate(DEFAULT_DRIVERS):
+        factor_abnormal[factor.key] = abnormal[:, j].tolist()
+        factor_abs_z[factor.key] = rounded[:, j].tolist()
+    columns["factor_abnormal"] = factor_abnormal
+    columns["factor_abs_z"] = factor_abs_z
+
+    return columns
+
+
+def timeseries_rows(columns: Dict) -> List[Dict]:
+    """Expand build_timeseries_columns() output into one dict per day."""
+    factor_keys = list(columns["factor_abs_z"].keys())
+    day_fields = ("date",) + METRIC_KEYS + ("is_dip", "dip_kind")
     out: List[Dict] = []
-    for r in records:
-        kind = dip_kind_by_date.get(r.date, "none")
-        is_dip = kind != "none"
-
-        factor_abn: Dict[str, bool] = {}
-        factor_abs_z: Dict[str, float] = {}
-
-        for factor in DEFAULT_DRIVERS:
-            abs_z = _factor_abs_z_for_day(r, factor, baselines)
-            if abs_z is None:
-                factor_abn[factor.key] = False
-                factor_abs_z[factor.key] = 0.0
-            else:
-                factor_abn[factor.key] = abs_z >= thresholds.abnormal_abs_z
-                factor_abs_z[factor.key] = float(abs_z)
-
-        out.append(
-            {
-                "date": r.date.isoformat(),
-                "recovery_value": _safe_float(r.recovery_value),
-                "sleep_duration": _safe_float(r.sleep_duration),
-                "sleep_consistency": _safe_float(r.sleep_consistency),
-                "excercise_data_point": _safe_float(r.excercise_data_point),
-                "nutrition_data_point": _safe_float(r.nutrition_data_point),
-                "is_dip": is_dip,
-                "dip_kind": kind,
-                "factor_abnormal": factor_abn,
-                "factor_abs_z": factor_abs_z,
-            }
-        )
-
+    for i in range(len(columns["date"])):
+        row = {f: columns[f][i] for f in day_fields}
+        row["factor_abnormal"] = {k: columns["factor_abnormal"][k][i] for k in factor_keys}
+        row["factor_abs_z"] = {k: columns["factor_abs_z"][k][i] for k in factor_keys}
+        out.append(row)
     return out
+
+
+def build_timeseries(
+    records: List[DailyRecord],
+    dips_result: DipDetectionResult,
+    baselines: BaselineSource,
+    pareto: Optional[ParetoResult] = None,
+    thresholds: AttributionThresholds = AttributionThresholds(),
+) -> List[Dict]:
+    """
+    Returns a list of dicts (JSON-ready) for easy API return.
+
+    Row-oriented view of build_timeseries_columns().
+    """
+    return timeseries_rows(
+        build_timeseries_columns(records, dips_result, baselines, pareto=pareto, thresholds=thresholds)
+    )
@@ -11,16 +11,21 @@ Design goals:
 """
 
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Dict, Optional, Tuple, List
+from dataclasses import dataclass, fields as dataclass_fields, replace
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple, List
+
+import numpy as np
+
 from app.domain.daily_record import DailyRecord
 from app.domain.config import AnalysisAssumptions 
+from app.domain.metrics import METRIC_KEYS, metric_row
 from app.services.analytics.baselines import BaselineStats
-from app.services.analytics.pareto_calculation import ParetoResult, FactorAttribution, DEFAULT_DRIVERS, AttributionThresholds
+from app.services.analytics._kernels import jit_or
+from app.services.analytics.pareto_calculation import ParetoResult, FactorAttribution, DEFAULT_DRIVERS
 from app.services.analytics.dips import DipDetectionResult
 
-
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Insight:
     title: str
     body: str
@@ -32,107 +37,199 @@ class Insight:
     resources: Optional[Dict[str, List[Dict[str, str]]]] = None  # optional
 
 
+_INSIGHT_FIELDS: Tuple[str, ...] = tuple(f.name for f in dataclass_fields(Insight))
+
+
+def insight_to_dict(insight: Insight) -> Dict[str, object]:
+    """
+    Dict of an Insight for API payloads. The nested dicts are copied (the
+    resources lists come straight from the caller's resources_by_factor),
+    which stays far cheaper than dataclasses.asdict's recursive deep copy.
+    """
+    out = {name: getattr(insight, name) for name in _INSIGHT_FIELDS}
+    for name in ("current_state", "stability"):
+        if out[name] is not None:
+            out[name] = dict(out[name])
+    if insight.resources is not None:
+        out["resources"] = {k: [dict(r) for r in v] for k, v in insight.resources.items()}
+    return out
+
+
+# Message fragments for current state / stability labels
+_STATE_PHRASES: Dict[str, str] = {
+    "below_normal": "below your normal range",
+    "within_normal": "within your normal range",
+    "above_normal": "above your normal range",
+}
+_STAB_PHRASES: Dict[str, str] = {
+    "volatile": "highly variable",
+    "stable": "consistent",
+}
+
+
+_CONTEXT_NOTE = (
+    "Context note: Factor attribution reflects associations within the available data and may be influenced by interactions between factors. "
+    "For example, increased training load without adequate sleep or nutrition may amplify the apparent impact of sleep on recovery."
+)
+
+
+# z-band cutoffs: z <= -0.75 is below, z >= 0.75 is above
+_BAND_LOW = -0.75
+_BAND_HIGH = 0.75
+_BANDS = np.array(["below_normal", "within_normal", "above_normal", "unknown"])
+
+
 def _band_from_z(z: Optional[float]) -> str:
     if z is None:
         return "unknown"
-    if z <= -0.75:
+    if z <= _BAND_LOW:
         return "below_normal"
-    if z >= 0.75:
+    if z >= _BAND_HIGH:
         return "above_normal"
     return "within_normal"
 
 
+def band_from_z_batch(zs: np.ndarray) -> np.ndarray:
+    """
+    Vectorized _band_from_z: array of band labels, "unknown" where z is NaN.
+    """
+    zs = np.asarray(zs, dtype=np.float64)
+    # Branchless 0/1/2 index: +1 once above the low cutoff, +1 again at the high one
+    idx = (zs > _BAND_LOW).astype(np.intp) + (zs >= _BAND_HIGH)
+    idx[np.isnan(zs)] = 3
+    return _BANDS[idx]
+
+
+# Conservative cutoff on std/|mean| (tune later if needed)
+_VOLATILE_RATIO = 0.15
+
+
 def _stability_from_std(b: BaselineStats) -> str:
-    if b.mean is None or b.std is None or b.n == 0:
+    m = b.mean
+    s = b.std
+    if m is None or s is None or b.n == 0:
         return "unknown"
+    am = abs(m)
     # If mean is near 0, std/mean isn't meaningful; fall back to absolute std
-    if abs(b.mean) < 1e-9:
-        return "volatile" if b.std > 0 else "stable"
-    ratio = abs(b.std / b.mean)
-    # Conservative cutoffs (tune later if needed)
-    if ratio >= 0.15:
-        return "volatile"
-    return "stable"
+    if am < 1e-9:
+        return "volatile" if s > 0 else "stable"
+    # |std/mean| >= cutoff, without the division
+    return "volatile" if abs(s) >= _VOLATILE_RATIO * am else "stable"
+
+
+_FACTOR_FIELDS_BY_KEY: Dict[str, Tuple[str, ...]] = {d.key: d.fields for d in DEFAULT_DRIVERS}
 
 
 def _factor_fields(factor_key: str) -> Tuple[str, ...]:
-    for d in DEFAULT_DRIVERS:
-        if d.key == factor_key:
-            return d.fields
-    return tuple()
+    return _FACTOR_FIELDS_BY_KEY.get(factor_key, ())
+
+
+def _factor_kernel_loop(
+    means: np.ndarray,
+    stds: np.ndarray,
+    ns: np.ndarray,
+    values: np.ndarray,
+) -> Tuple[float, bool, bool]:
+    """
+    Numeric core of _factor_state_and_stability over one factor's fields.
+    Missing baselines are n == 0 / mean NaN, missing values are NaN.
+
+    Returns (best_z, any_volatile, any_stable); best_z is NaN when no field
+    could be scored. Written so numba can compile it; the single-insight
+    path runs it as plain Python over short lists, where the JIT call and
+    array setup would cost more than the loop itself.
+    """
+    best_abs_z = -1.0
+    best_z = np.nan
+    any_volatile = False
+    any_stable = False
+    for i in range(len(means)):
+        m = means[i]
+        s = stds[i]
+        if ns[i] == 0 or m != m or s != s:
+            continue
+
+        # z-score: same rules as baselines.z_score (first field wins ties)
+        v = values[i]
+        if v == v:
+            if s == 0.0:
+                z = 0.0 if v == m else np.nan
+            else:
+                z = (v - m) / s
+            if z == z and abs(z) > best_abs_z:
+                best_abs_z = abs(z)
+                best_z = z
+
+        # Stability: same rules as _stability_from_std
+        am = abs(m)
+        if am < 1e-9:
+            volatile = s > 0
+        else:
+            volatile = abs(s) >= _VOLATILE_RATIO * am
+        if volatile:
+            any_volatile = True
+        else:
+            any_stable = True
+    return (best_z, any_volatile, any_stable)
+
+
+_factor_kernel = jit_or(
+    _factor_kernel_loop,
+    warm_args=(np.zeros(1), np.zeros(1), np.zeros(1, dtype=np.int64), np.zeros(1)),
+)
 
 
 def _factor_state_and_stability(
     factor_key: str,
     baselines: Dict[str, BaselineStats],
     latest_values: Dict[str, Optional[float]],
-    # This should match pareto.py abnormal threshold for consistent messaging
-    abnormal_thresholds: AttributionThresholds = AttributionThresholds(),
 ) -> Tuple[str, str]:
     """
     Returns (state, stability) for the factor category.
 
-    - state: below/within/above normal (based on best available field)
-    - stability: stable/volatile/unknown (based on baseline std)
+    - state: below/within/above normal (based on best available field,
+      largest abs z, similar to pareto factor scoring)
+    - stability: stable/volatile/unknown (based on baseline std; the
+      "most volatile" field wins for safety)
     """
     fields = _factor_fields(factor_key)
     if not fields:
         return ("unknown", "unknown")
 
-    # Choose the "strongest" field (largest abs z), similar to pareto factor scoring.
-    best_z: Optional[float] = None
-    best_field: Optional[str] = None
-
+    means: List[float] = []
+    stds: List[float] = []
+    ns: List[int] = []
+    values: List[float] = []
     for f in fields:
         b = baselines.get(f)
-        v = latest_values.get(f)
-        if b is None or v is None or b.mean is None or b.std is None or b.n == 0:
-            continue
-        if b.std == 0:
-            z = 0.0 if v == b.mean else None
+        if b is not None and b.mean is not None and b.std is not None:
+            means.append(b.mean)
+            stds.append(b.std)
+            ns.append(b.n)
         else:
-            z = (v - b.mean) / b.std
-
-        if z is None:
-            continue
-        if best_z is None or abs(z) > abs(best_z):
-            best_z = float(z)
-            best_field = f
-
-    state = _band_from_z(best_z)
+            means.append(np.nan)
+            stds.append(np.nan)
+            ns.append(0)
+        v = latest_values.get(f)
+        values.append(np.nan if v is None else v)
 
-    # Stability: we compute per-field and take the "most volatile" for safety
-    stabilities: List[str] = []
-    for f in fields:
-        b = baselines.get(f)
-        if b is None:
-            continue
-        stabilities.append(_stability_from_std(b))
-
-    if not stabilities:
-        stability = "unknown"
-    elif "volatile" in stabilities:
-        stability = "volatile"
-    elif "stable" in stabilities:
-        stability = "stable"
-    else:
-        stability = "unknown"
+    best_z, any_volatile, any_stable = _factor_kernel_loop(means, stds, ns, values)
 
+    state = _band_from_z(None if best_z != best_z else float(best_z))
+    stability = "volatile" if any_volatile else ("stable" if any_stable else "unknown")
     return (state, stability)
 
 
 def _signal_strength_label(
-    pareto: ParetoResult,
-    dips_result: DipDetectionResult,
-    constants: AnalysisAssumptions,
+    dominant_key: Optional[str],
+    dip_count: int,
+    large_count: int,
+    min_observations: int,
 ) -> str:
-    dip_count = len(dips_result.all)
-    large_count = len(dips_result.large)
-
-    if pareto.dominant_key is None:
+    if dominant_key is None:
         return "Low"
 
-    if dip_count >= max(constants.min_observations, 10) and large_count >= 2:
+    if dip_count >= max(min_observations, 10) and large_count >= 2:
         return "High"
 
     if dip_count >= 5:
@@ -141,6 +238,102 @@ def _signal_strength_label(
     return "low"
 
 
+def _baseline_key(b) -> Optional[Tuple[Optional[float], Optional[float], int]]:
+    """
+    Cache-key form of a baseline: its values, not the object. RollingStats
+    (a BaselineStats stand-in) is mutable and hashes by identity.
+    """
+    return None if b is None else (b.mean, b.std, b.n)
+
+
+@lru_cache(maxsize=1024)
+def _dominant_factor_insight(
+    primary_factor: str,
+    primary_percent: float,
+    runner_up: Optional[str],
+    field_baselines: Tuple[Optional[Tuple[Optional[float], Optional[float], int]], ...],
+    field_values: Tuple[Optional[float], ...],
+    dominant_key: Optional[str],
+    dip_count: int,
+    large_count: int,
+    min_observations: int,
+) -> Insight:
+    """
+    Dominant-factor insight from everything it depends on, as hashable
+    arguments, so repeated requests for the same (user, window) are a
+    cache hit. field_* are aligned with _factor_fields(primary_factor);
+    baselines are passed by value as (mean, std, n) (see _baseline_key).
+
+    Cached instances are shared, so build_insight hands callers a copy
+    with their own dicts rather than the cached Insight itself.
+    """
+    fields = _factor_fields(primary_factor)
+    baselines = {
+        f: BaselineStats(mean=b[0], std=b[1], n=b[2])
+        for f, b in zip(fields, field_baselines)
+        if b is not None
+    }
+    latest_values = dict(zip(fields, field_values))
+    state, stability = _factor_state_and_stability(primary_factor, baselines, latest_values)
+
+    return _compose_dominant_insight(
+        primary_factor,
+        primary_percent,
+        runner_up,
+        state,
+        stability,
+        _signal_strength_label(dominant_key, dip_count, large_count, min_observations),
+    )
+
+
+def _compose_dominant_insight(
+    primary_factor: str,
+    primary_percent: float,
+    runner_up: Optional[str],
+    state: str,
+    stability: str,
+    signal_strength: str,
+) -> Insight:
+    """Message text for a dominant-factor insight with labels already resolved."""
+    pf_cap = primary_factor.capitalize()
+    title = f"Primary dip-associated factor: {pf_cap}"
+
+    # Body: fixed sentence order, joined by single spaces
+    sensitivity = (
+        f" For you, recovery appears more sensitive to {primary_factor} than to {runner_up}."
+        if runner_up
+        else ""
+    )
+
+    # State / stability messaging
+    if state != "unknown":
+        state_phrase = _STATE_PHRASES.get(state, "relative to your normal range")
+        state_sentence = f"Current state: {primary_factor} is {state_phrase}."
+    else:
+        state_sentence = f"Current state: {primary_factor} data is unavailable or insufficient for recent days."
+
+    if stability != "unknown":
+        stab_phrase = _STAB_PHRASES.get(stability, "consistent")
+        stability_sentence = f"Stability: {primary_factor} has been {stab_phrase} recently."
+    else:
+        stability_sentence = f"Stability: not enough data to evaluate recent {primary_factor} consistency."
+
+    body = (
+        f"{pf_cap} correlates with the largest share of recovery dips in this window ({primary_percent:.0f}%)."
+        f"{sensitivity} {_CONTEXT_NOTE} {state_sentence} {stability_sentence}"
+    )
+
+    return Insight(
+        title=title,
+        body=body,
+        primary_factor=primary_factor,
+        primary_percent=primary_percent,
+        current_state={primary_factor: state},
+        stability={primary_factor: stability},
+        signal_strength=signal_strength,
+    )
+
+
 def build_insight(
     pareto: ParetoResult,
     dips_result: DipDetectionResult,
@@ -174,7 +367,7 @@ def build_insight(
 
     # No dips/insufficient signal
     if len(dips_result.all) == 0 or not pareto.factors_ranked:
-        reason = pareto.meta.get("reason") if isinstance(pareto.meta, dict) else None
+        reason = pareto.reason
         if reason == "insufficient_history":
             body = "Not enough history to evaluate recovery factors yet. Add more days of data to improve signal."
         elif reason == "no_explanatory_signal":
@@ -199,76 +392,137 @@ def build_insight(
     top: FactorAttribution = pareto.factors_ranked[0]
 
     primary_factor = dominant if dominant is not None else top.key
-    primary_percent = float(top.percent)
-
-    state, stability = _factor_state_and_stability(primary_factor, baselines, latest_values)
-
     runner_up = pareto.factors_ranked[1].key if len(pareto.factors_ranked) > 1 else None
-
-    title = f"Primary dip-associated factor: {primary_factor.capitalize()}"
-
-    # Body
-    parts: List[str] = []
-    parts.append(
-        f"{primary_factor.capitalize()} correlates with the largest share of recovery dips in this window ({primary_percent:.0f}%)."
-    )
-    if runner_up:
-        parts.append(
-            f"For you, recovery appears more sensitive to {primary_factor} than to {runner_up}."
-        )
-
-    parts.append(
-        "Context note: Factor attribution reflects associations within the available data and may be influenced by interactions between factors. "
-        "For example, increased training load without adequate sleep or nutrition may amplify the apparent impact of sleep on recovery."
+    fields = _factor_fields(primary_factor)
+
+    cached = _dominant_factor_insight(
+        primary_factor,
+        float(top.percent),
+        runner_up,
+        tuple(_baseline_key(baselines.get(f)) for f in fields),
+        tuple(latest_values.get(f) for f in fields),
+        dominant,
+        len(dips_result.all),
+        len(dips_result.large),
+        constants.min_observations,
     )
 
-    # State / stability messaging
-    if state != "unknown":
-        state_phrase = {
-            "below_normal": "below your normal range",
-            "within_normal": "within your normal range",
-            "above_normal": "above your normal range",
-        }.get(state, "relative to your normal range")
-
-        parts.append(
-            f"Current state: {primary_factor} is {state_phrase}."
-        )
-    else:
-        parts.append(
-            f"Current state: {primary_factor} data is unavailable or insufficient for recent days."
-        )
-
-    if stability != "unknown":
-        stab_phrase = "highly variable" if stability == "volatile" else "consistent"
-        parts.append(
-            f"Stability: {primary_factor} has been {stab_phrase} recently."
-        )
-    else:
-        parts.append(
-            f"Stability: not enough data to evaluate recent {primary_factor} consistency."
-        )
+    resources = None
+    if resources_by_factor and primary_factor in resources_by_factor:
+        resources = {primary_factor: resources_by_factor[primary_factor]}
 
+    return replace(
+        cached,
+        current_state=dict(cached.current_state),
+        stability=dict(cached.stability),
+        resources=resources,
+    )
 
-    body = " ".join(parts)
 
-    signal_strength = _signal_strength_label(pareto, dips_result, constants)
+def _factor_rows_loop(
+    means: np.ndarray,
+    stds: np.ndarray,
+    ns: np.ndarray,
+    values: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    _factor_kernel applied to each row of (B, F) arrays (rows NaN/0-padded
+    to the widest factor). Returns (best_z, any_volatile, any_stable), one
+    per row.
+    """
+    rows = means.shape[0]
+    best_z = np.empty(rows)
+    any_volatile = np.zeros(rows, dtype=np.bool_)
+    any_stable = np.zeros(rows, dtype=np.bool_)
+    for r in range(rows):
+        best_z[r], any_volatile[r], any_stable[r] = _factor_kernel(means[r], stds[r], ns[r], values[r])
+    return (best_z, any_volatile, any_stable)
+
+
+_factor_rows = jit_or(
+    _factor_rows_loop,
+    warm_args=(np.zeros((1, 1)), np.zeros((1, 1)), np.zeros((1, 1), dtype=np.int64), np.zeros((1, 1))),
+)
+
+
+def build_insights(
+    paretos: Sequence[ParetoResult],
+    dips_results: Sequence[DipDetectionResult],
+    recovery_stable: Sequence[bool],
+    baselines: Sequence[Dict[str, BaselineStats]],
+    latest_values: Sequence[Dict[str, Optional[float]]],
+    constants: AnalysisAssumptions,
+    resources_by_factor: Optional[Dict[str, List[Dict[str, str]]]] = None,
+) -> List[Insight]:
+    """
+    Batched build_insight for backfills: the i-th insight is built from the
+    i-th item of each sequence and matches build_insight on the same inputs.
 
-    insight = Insight(
-        title=title,
-        body=body,
-        primary_factor=primary_factor,
-        primary_percent=primary_percent,
-        current_state={primary_factor: state},
-        stability={primary_factor: stability},
-        signal_strength=signal_strength,
-    )
+    Factor state/stability for every dominant-factor item is scored in one
+    vectorized pass; only message composition stays per item.
+    Raises ValueError when the input sequences differ in length.
+    """
+    n = len(paretos)
+    if any(len(seq) != n for seq in (dips_results, recovery_stable, baselines, latest_values)):
+        raise ValueError("build_insights inputs must all have the same length")
+
+    insights: List[Optional[Insight]] = [None] * n
+    pending: List[Tuple[int, str, float, Optional[str]]] = []
+
+    for i, (pareto, dips_result) in enumerate(zip(paretos, dips_results)):
+        if recovery_stable[i] or len(dips_result.all) == 0 or not pareto.factors_ranked:
+            # Stable / no-signal messages are fixed text
+            insights[i] = build_insight(
+                pareto, dips_result, recovery_stable[i], baselines[i], latest_values[i], constants
+            )
+            continue
+        ranked = pareto.factors_ranked
+        primary_factor = pareto.dominant_key if pareto.dominant_key is not None else ranked[0].key
+        runner_up = ranked[1].key if len(ranked) > 1 else None
+        pending.append((i, primary_factor, float(ranked[0].percent), runner_up))
+
+    if pending:
+        width = max(1, max(len(_factor_fields(pf)) for _, pf, _, _ in pending))
+        means = np.full((len(pending), width), np.nan)
+        stds = np.full((len(pending), width), np.nan)
+        ns = np.zeros((len(pending), width), dtype=np.int64)
+        values = np.full((len(pending), width), np.nan)
+        for row, (i, primary_factor, _, _) in enumerate(pending):
+            for j, f in enumerate(_factor_fields(primary_factor)):
+                b = baselines[i].get(f)
+                if b is not None and b.mean is not None and b.std is not None:
+                    means[row, j], stds[row, j], ns[row, j] = b.mean, b.std, b.n
+                v = latest_values[i].get(f)
+                if v is not None:
+                    values[row, j] = v
+
+        best_z, any_volatile, any_stable = _factor_rows(means, stds, ns, values)
+        states = band_from_z_batch(best_z).tolist()
+        stabilities = np.where(any_volatile, "volatile", np.where(any_stable, "stable", "unknown")).tolist()
+
+        for row, (i, primary_factor, primary_percent, runner_up) in enumerate(pending):
+            dips_result = dips_results[i]
+            insights[i] = _compose_dominant_insight(
+                primary_factor,
+                primary_percent,
+                runner_up,
+                states[row],
+                stabilities[row],
+                _signal_strength_label(
+                    paretos[i].dominant_key,
+                    len(dips_result.all),
+                    len(dips_result.large),
+                    constants.min_observations,
+                ),
+            )
 
-    if resources_by_factor and primary_factor in resources_by_factor:
-        insight = Insight(
-            **{**insight.__dict__, "resources": {primary_factor: resources_by_factor[primary_factor]}}
-        )
+    if resources_by_factor:
+        for i, insight in enumerate(insights):
+            pf = insight.primary_factor
+            if pf is not None and pf in resources_by_factor:
+                insights[i] = replace(insight, resources={pf: resources_by_factor[pf]})
 
-    return insight
+    return insights
 
 
 def extract_latest_values(records: List[DailyRecord]) -> Dict[str, Optional[float]]:
@@ -278,28 +532,42 @@ def extract_latest_values(records: List[DailyRecord]) -> Dict[str, Optional[floa
 
     Returns keys matching DailyRecord field names used by baselines/pareto.
     """
-    keys = [
-        "sleep_duration",
-        "sleep_consistency",
-        "excercise_data_point",
-        "nutrition_data_point",
-        "recovery_value",
-    ]
+    keys = METRIC_KEYS
     latest: Dict[str, Optional[float]] = {k: None for k in keys}
 
+    # Column positions still unfilled; shrinks as values are found, usually within a day or two
+    remaining: List[int] = list(range(len(keys)))
     for r in reversed(records):
-        for k in keys:
-            if latest[k] is not None:
-                continue
-            v = getattr(r, k, None)
+        values = metric_row(r)  # all metric fields in one C-level call
+        for i in list(remaining):
+            v = values[i]
             if v is None:
                 continue
             try:
-                latest[k] = float(v)
+                latest[keys[i]] = float(v)
             except (TypeError, ValueError):
                 continue
+            remaining.remove(i)
 
-        if all(latest[k] is not None for k in keys):
+        if not remaining:
             break
 
     return latest
+
+
+def latest_values_from_matrix(matrix: np.ndarray) -> Dict[str, Optional[float]]:
+    """
+    Same result as extract_latest_values, read from a records_to_matrix()
+    matrix: the last non-NaN entry of each column.
+    """
+    if matrix.shape[0] == 0:
+        return {key: None for key in METRIC_KEYS}
+
+    present = ~np.isnan(matrix)
+    has_value = present.any(axis=0)
+    last_row = matrix.shape[0] - 1 - np.argmax(present[::-1], axis=0)
+
+    latest: Dict[str, Optional[float]] = {}
+    for j, key in enumerate(METRIC_KEYS):
+        latest[key] = float(matrix[last_row[j], j]) if has_value[j] else None
+    return latest
@@ -17,12 +17,16 @@ Key design constraints:
 """
 
 from __future__ import annotations
-from dataclasses import dataclass
-from datetime import date, timedelta
-from typing import Dict, List, Optional, Tuple, Set
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple, Set
+
+import numpy as np
+
 from app.domain.daily_record import DailyRecord
 from app.domain.config import AnalysisAssumptions  # adjust import if needed
-from app.services.analytics.baselines import BaselineStats, z_score
+from app.services.analytics.baselines import METRIC_INDEX, BaselineSource, records_to_matrix, z_score_matrix
+from app.services.analytics._kernels import jit_or
 from app.services.analytics.dips import DipEvent, DipDetectionResult  # if you implemented Option A
 
 
@@ -40,6 +44,11 @@ class ParetoResult:
     factors_ranked: List[FactorAttribution]
     dominant_key: Optional[str]
     meta: Dict[str, object]
+    reason: Optional[str] = field(init=False, default=None)  # why nothing was ranked
+
+    def __post_init__(self) -> None:
+        # Derived from meta so early returns state the reason only once
+        object.__setattr__(self, "reason", self.meta.get("reason"))
 
 
 
@@ -49,14 +58,50 @@ class FactorConfig:
     key: str
     # DailyRecord fields that represent this factor
     fields: Tuple[str, ...]
+    # Sign of z that plausibly hurts recovery (+1 above baseline, -1 below, 0 either)
+    harmful_sign: int = 0
 
 
 DEFAULT_DRIVERS: Tuple[FactorConfig, ...] = (
-    FactorConfig(key="sleep", fields=("sleep_duration", "sleep_consistency")),
-    FactorConfig(key="exercise", fields=("excercise_data_point",)),
-    FactorConfig(key="nutrition", fields=("nutrition_data_point",)),
+    # Lower sleep / worse consistency is the hypothesized stressor
+    FactorConfig(key="sleep", fields=("sleep_duration", "sleep_consistency"), harmful_sign=-1),
+    # High training load is the hypothesized stressor
+    FactorConfig(key="exercise", fields=("excercise_data_point",), harmful_sign=1),
+    # Under-nutrition is the hypothesized stressor
+    FactorConfig(key="nutrition", fields=("nutrition_data_point",), harmful_sign=-1),
 )
 
+
+def factor_columns(factor: FactorConfig) -> np.ndarray:
+    """Column indices of the factor's fields in a records_to_matrix() matrix."""
+    return np.array([METRIC_INDEX[f] for f in factor.fields], dtype=np.intp)
+
+
+def factor_index_matrix(factors: Tuple[FactorConfig, ...]) -> np.ndarray:
+    """
+    (factors, max_fields) matrix of column indices, padded with -1 so factors
+    with different field counts can be reduced together.
+    """
+    width = max((len(f.fields) for f in factors), default=0)
+    cols = np.full((len(factors), width), -1, dtype=np.intp)
+    for i, f in enumerate(factors):
+        cols[i, : len(f.fields)] = factor_columns(f)
+    return cols
+
+
+# Resolved once for the static driver set
+DEFAULT_FACTOR_INDEX: np.ndarray = factor_index_matrix(DEFAULT_DRIVERS)
+
+
+def factor_strengths(abs_z: np.ndarray, cols: np.ndarray = DEFAULT_FACTOR_INDEX) -> np.ndarray:
+    """
+    Per-day strength of every factor at once: (days, factors) max abs z over
+    each factor's fields, np.nan where none of its fields are scorable.
+    """
+    gathered = abs_z[:, np.where(cols >= 0, cols, 0)]  # (days, factors, max_fields)
+    gathered[:, cols < 0] = np.nan  # padding never wins
+    return np.fmax.reduce(gathered, axis=2)
+
 # Abnormal z-score threshold
 @dataclass(frozen=True)
 class AttributionThresholds:
@@ -64,30 +109,45 @@ class AttributionThresholds:
 
 
 # Helpers
-def _index_records_by_date(records: List[DailyRecord]) -> Dict[date, DailyRecord]:
-    return {r.date: r for r in records}
-
-
-def _get_field_value(r: DailyRecord, field: str) -> Optional[float]:
-    v = getattr(r, field, None)
-    if v is None:
-        return None
-    try:
-        return float(v)
-    except (TypeError, ValueError):
-        return None
-
-def _is_factor_abnormal(
-    record: DailyRecord,
-    factor: FactorConfig,
-    baselines: Dict[str, BaselineStats],
+def _day_offsets(dates: Iterable[date], start: date, count: int) -> np.ndarray:
+    """
+    Whole days from `start` to each date. Uses proleptic ordinals (plain
+    ints), so no timedelta is allocated per date.
+    """
+    origin = start.toordinal()
+    return np.fromiter((d.toordinal() - origin for d in dates), dtype=np.int64, count=count)
+
+
+def _rows_by_day(offsets: np.ndarray) -> np.ndarray:
+    """
+    Day offset -> row of that day's record, -1 where there is no record.
+    If a date repeats, the last record wins (like a date-keyed dict).
+    """
+    n_days = int(offsets.max()) + 1 if offsets.size else 0
+    rows = np.full(n_days, -1, dtype=np.int64)
+    # np.unique keeps the first occurrence, so scan from the end
+    uniq, first_from_end = np.unique(offsets[::-1], return_index=True)
+    rows[uniq] = offsets.size - 1 - first_from_end
+    return rows
+
+
+def _factor_abnormality(
+    records: List[DailyRecord],
+    factors: Tuple[FactorConfig, ...],
+    baselines: BaselineSource,
     thresholds: AttributionThresholds,
-) -> Tuple[bool, float]:
+    matrix: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
     """
+    Abnormality of every factor on every day, in one vectorized pass.
+
     Returns:
-      (abnormal?, abs_z_strength)
+      (abnormal[days, factors] bool, abs_z_strength[days, factors]);
+      strength is 0.0 wherever the factor is not abnormal.
 
-    Directional consistency:
+    Each factor is represented on a day by its field with the largest abs z.
+
+    Directional consistency (FactorConfig.harmful_sign):
     - exercise: only count as contributing to a dip if it's ABOVE baseline (z > 0)
     - sleep: only count if it's BELOW baseline (z < 0)
     - nutrition: only count if it's BELOW baseline (z < 0)
@@ -95,87 +155,134 @@ def _is_factor_abnormal(
     Note: This is associative, not causal. It's a conservative filter to avoid crediting
     "good-direction" deviations as explanations for recovery drops.
     """
-    # Determine the signed z-score that best represents this factor on this day.
-    best_signed_z: Optional[float] = None
-    best_abs_z: float = 0.0
-
-    for field in factor.fields:
-        b = baselines.get(field)
-        if b is None:
-            continue
-        val = _get_field_value(record, field)
-        if val is None:
-            continue
-        z = z_score(val, b)
-        if z is None:
-            continue
-
-        az = abs(float(z))
-        if az > best_abs_z:
-            best_abs_z = az
-            best_signed_z = float(z)
-
-    if best_signed_z is None:
-        return (False, 0.0)
-
-    # Direction filter (plausibly harmful direction for recovery dips)
-    if factor.key == "exercise":
-        # High training load is the hypothesized stressor
-        if best_signed_z <= 0:
-            return (False, 0.0)
-    elif factor.key in ("sleep", "nutrition"):
-        # Lower sleep / worse consistency or under-nutrition is the hypothesized stressor
-        if best_signed_z >= 0:
-            return (False, 0.0)
-
-    return (best_abs_z >= thresholds.abnormal_abs_z, float(best_abs_z))
-
-
+    if matrix is None:
+        matrix = records_to_matrix(records)
+    z = z_score_matrix(matrix, baselines)
+    cols = DEFAULT_FACTOR_INDEX if factors is DEFAULT_DRIVERS else factor_index_matrix(factors)
+
+    # (days, factors, max_fields); padding and unscorable fields never win
+    gathered = z[:, np.where(cols >= 0, cols, 0)]
+    gathered[:, cols < 0] = np.nan
+    abs_z = np.where(np.isnan(gathered), -1.0, np.abs(gathered))
+    best = np.argmax(abs_z, axis=2)[..., None]  # first field wins ties
+    best_abs_z = np.take_along_axis(abs_z, best, axis=2)[..., 0]
+    best_signed_z = np.take_along_axis(gathered, best, axis=2)[..., 0]
+
+    # Direction filter (plausibly harmful direction for recovery dips), branchless:
+    # the signed z times the factor's harmful sign must be positive. A factor with
+    # no non-zero z on a day has nothing to report.
+    signs = np.array([f.harmful_sign for f in factors], dtype=np.float64)
+    scored = (best_abs_z > 0.0) & ((signs == 0) | (best_signed_z * signs > 0))
+
+    abnormal = scored & (best_abs_z >= thresholds.abnormal_abs_z)
+    return (abnormal, np.where(abnormal, best_abs_z, 0.0))
+
+
+def _dip_window_evidence_loop(
+    dip_offsets: np.ndarray,
+    row_of_day: np.ndarray,
+    abnormal: np.ndarray,
+    strengths: np.ndarray,
+    max_lag_days: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For every dip, over the days in its lag window (dip day + prior lag days)
+    that have a record: was each factor abnormal, and its strongest abs z.
 
-def _dip_weight(dip: DipEvent) -> float:
-    if dip.kind == "large":
-        return 1.25
-    return 1.0 # Persistent dip
+    Returns (contributed[dips, factors] bool, strength[dips, factors]).
+    Written so numba can compile it.
+    """
+    n_dips = dip_offsets.shape[0]
+    n_days = row_of_day.shape[0]
+    n_factors = abnormal.shape[1]
+    contributed = np.zeros((n_dips, n_factors), dtype=np.bool_)
+    strength = np.zeros((n_dips, n_factors), dtype=np.float64)
+    for i in range(n_dips):
+        lo = max(0, dip_offsets[i] - max_lag_days)
+        hi = min(n_days, dip_offsets[i] + 1)
+        for day in range(lo, hi):
+            row = row_of_day[day]
+            if row < 0:
+                continue
+            for k in range(n_factors):
+                if abnormal[row, k]:
+                    contributed[i, k] = True
+                    if strengths[row, k] > strength[i, k]:
+                        strength[i, k] = strengths[row, k]
+    return contributed, strength
+
+
+def _dip_window_evidence_numpy(
+    dip_offsets: np.ndarray,
+    row_of_day: np.ndarray,
+    abnormal: np.ndarray,
+    strengths: np.ndarray,
+    max_lag_days: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized equivalent of _dip_window_evidence_loop via a (dips, lags) row gather."""
+    n_days = row_of_day.shape[0]
+    if n_days == 0:
+        shape = (dip_offsets.shape[0], abnormal.shape[1])
+        return np.zeros(shape, dtype=bool), np.zeros(shape)
+
+    days = dip_offsets[:, None] - np.arange(max_lag_days + 1)  # (dips, lags)
+    in_range = (days >= 0) & (days < n_days)
+    rows = np.where(in_range, row_of_day[np.clip(days, 0, n_days - 1)], -1)
+    has_row = (rows >= 0)[..., None]
+    safe_rows = np.where(rows >= 0, rows, 0)
+
+    contributed = (abnormal[safe_rows] & has_row).any(axis=1)
+    strength = np.where(has_row, strengths[safe_rows], 0.0).max(axis=1)
+    return contributed, strength
+
+
+_dip_window_evidence = jit_or(
+    _dip_window_evidence_loop,
+    _dip_window_evidence_numpy,
+    warm_args=(
+        np.zeros(1, dtype=np.int64),
+        np.zeros(1, dtype=np.int64),
+        np.zeros((1, 1), dtype=np.bool_),
+        np.zeros((1, 1)),
+        1,
+    ),
+)
 
 
-def _date_range(start: date, end: date) -> List[date]:
-    """Inclusive start, inclusive end."""
-    days = []
-    cur = start
-    while cur <= end:
-        days.append(cur)
-        cur += timedelta(days=1)
-    return days
+def _dip_weights(dips: List[DipEvent]) -> np.ndarray:
+    """Severity weight per dip: large dips count 1.25, persistent dips 1.0."""
+    return np.where(np.array([d.kind == "large" for d in dips], dtype=bool), 1.25, 1.0)
 
 
 def _count_consistent_windows(
-    dip_dates: List[date],
-    contributing_dates: Set[date],
+    dip_offsets: np.ndarray,
+    contributed: np.ndarray,
     days_window: int,
 ) -> int:
     """
     Counts how many rolling windows contain at least one dip date where
     this factor contributed (within lag window).
 
+    dip_offsets: dip dates as sorted day offsets
+    contributed: bool per dip (same order) - did this factor contribute?
+
     We anchor windows to dip dates for interpretability.
     """
-    if not dip_dates:
+    n = dip_offsets.shape[0]
+    if n == 0:
         return 0
 
-    # Sort dip dates and create non-overlapping windows of size days_window
-    dip_dates = sorted(dip_dates)
+    # Non-overlapping windows of size days_window, walked with two pointers
     windows = 0
     i = 0
-    while i < len(dip_dates):
-        w_start = dip_dates[i]
-        w_end = w_start + timedelta(days=days_window - 1)
+    while i < n:
+        w_end = dip_offsets[i] + days_window - 1
+        # first dip after this window
+        j = int(np.searchsorted(dip_offsets, w_end, side="right"))
         # did the factor contribute to ANY dip in this window?
-        hit = any((d in contributing_dates) for d in dip_dates[i:] if d <= w_end)
-        if hit:
+        if contributed[i:j].any():
             windows += 1
-        # advance i to first dip date after this window
-        while i < len(dip_dates) and dip_dates[i] <= w_end:
-            i += 1
+        i = j
     return windows
 
 
@@ -183,10 +290,11 @@ def _count_consistent_windows(
 def compute_pareto_attribution(
     records: List[DailyRecord],
     dips_result: DipDetectionResult,
-    baselines: Dict[str, BaselineStats],
+    baselines: BaselineSource,
     constants: AnalysisAssumptions,
     factors: Tuple[FactorConfig, ...] = DEFAULT_DRIVERS,
     thresholds: AttributionThresholds = AttributionThresholds(),
+    matrix: Optional[np.ndarray] = None,
 ) -> ParetoResult:
     """
     Returns Pareto attribution across factors:
@@ -195,6 +303,8 @@ def compute_pareto_attribution(
 
     Required baselines keys:
       "sleep_duration", "sleep_consistency", "excercise_data_point", "nutrition_data_point"
+
+    `matrix` may carry records_to_matrix(records) when the caller already built it.
     """
     # Gate on minimum history (don’t hallucinate signal)
     if len(records) < constants.min_history_days:
@@ -212,50 +322,37 @@ def compute_pareto_attribution(
             meta={"reason": "no_dips", "dip_count": 0},
         )
 
-    rec_by_date = _index_records_by_date(records)
-
-    # Build the set of "dip context dates" (dip day + prior lag days)
-    dip_context_dates: Set[date] = set()
-    for dip in all_dips:
-        for lag in range(0, constants.max_lag_days + 1):
-            dip_context_dates.add(dip.date - timedelta(days=lag))
-
-    # Score accumulators
-    raw_scores: Dict[str, float] = {d.key: 0.0 for d in factors}
-    occurrences: Dict[str, int] = {d.key: 0 for d in factors}
-    abs_z_sums: Dict[str, float] = {d.key: 0.0 for d in factors}
-    # For window consistency tracking: which dip dates did this factor contribute to?
-    contributed_to_dip_dates: Dict[str, Set[date]] = {d.key: set() for d in factors}
-
-    # --- Core attribution loop: iterate dips; check abnormal behavior within lag window ---
-    for dip in all_dips:
-        dip_w = _dip_weight(dip)
-
-        # For each factor, find if it was abnormal in the dip's lag window
-        for factor in factors:
-            best_strength = 0.0
-            contributed = False
-
-            for lag in range(0, constants.max_lag_days + 1):
-                day = dip.date - timedelta(days=lag)
-                rec = rec_by_date.get(day)
-                if rec is None:
-                    continue
-
-                is_abn, strength = _is_factor_abnormal(rec, factor, baselines, thresholds)
-                if not is_abn:
-                    continue
-
-                contributed = True
-                if strength > best_strength:
-                    best_strength = strength
-
-            if contributed:
-                # Weighted by dip severity kind + strength of deviation
-                raw_scores[factor.key] += dip_w * best_strength
-                occurrences[factor.key] += 1
-                abs_z_sums[factor.key] += best_strength
-                contributed_to_dip_dates[factor.key].add(dip.date)
+    # Integer day offsets from the first record; dip lag windows become slices
+    start = min((r.date for r in records), default=date.min)
+    offsets = _day_offsets((r.date for r in records), start, len(records))
+    row_of_day = _rows_by_day(offsets)
+    abnormal, strengths = _factor_abnormality(records, factors, baselines, thresholds, matrix=matrix)
+
+    dip_offsets = _day_offsets((dip.date for dip in all_dips), start, len(all_dips))
+
+    # "Dip context" days (dip day + prior lag days) as a bitmap over day offsets:
+    # +1 where each lag window opens, -1 one past where it closes, then a running sum
+    n_days = row_of_day.size
+    lo = np.clip(dip_offsets - constants.max_lag_days, 0, n_days)
+    hi = np.clip(dip_offsets + 1, lo, n_days)
+    marks = np.zeros(n_days + 1, dtype=np.int64)
+    np.add.at(marks, lo, 1)
+    np.add.at(marks, hi, -1)
+    in_context = np.cumsum(marks[:n_days]) > 0
+
+    # --- Core attribution: for each dip, was each factor abnormal within its lag window? ---
+    # (strength is 0.0 on non-abnormal days, so the max is over abnormal days)
+    contributed_by_dip, strength_by_dip = _dip_window_evidence(
+        dip_offsets, row_of_day, abnormal, strengths, int(constants.max_lag_days)
+    )
+
+    # Score accumulators: weighted by dip severity kind + strength of deviation
+    keys = [d.key for d in factors]
+    dip_weights = _dip_weights(all_dips)
+    credited = np.where(contributed_by_dip, strength_by_dip, 0.0)
+    raw_scores: Dict[str, float] = dict(zip(keys, (dip_weights[:, None] * credited).sum(axis=0).tolist()))
+    occurrences: Dict[str, int] = dict(zip(keys, contributed_by_dip.sum(axis=0).tolist()))
+    abs_z_sums: Dict[str, float] = dict(zip(keys, credited.sum(axis=0).tolist()))
 
     # If nothing contributed, return "no dominant" cleanly
     if sum(raw_scores.values()) == 0.0:
@@ -270,18 +367,11 @@ def compute_pareto_attribution(
         )
 
     # --- Noise penalty: downweight factors that deviate frequently outside dip context ---
-    # Count abnormal days overall and abnormal days inside dip_context_dates
-    total_abnormal: Dict[str, int] = {d.key: 0 for d in factors}
-    abnormal_in_context: Dict[str, int] = {d.key: 0 for d in factors}
-
-    for r in records:
-        for factor in factors:
-            is_abn, _strength = _is_factor_abnormal(r, factor, baselines, thresholds)
-            if not is_abn:
-                continue
-            total_abnormal[factor.key] += 1
-            if r.date in dip_context_dates:
-                abnormal_in_context[factor.key] += 1
+    # Count abnormal days overall and abnormal days inside the dip context
+    total_abnormal: Dict[str, int] = dict(zip(keys, abnormal.sum(axis=0).tolist()))
+    abnormal_in_context: Dict[str, int] = dict(
+        zip(keys, (abnormal & in_context[offsets][:, None]).sum(axis=0).tolist())
+    )
 
     # Apply penalty based on "noise ratio" = abnormal outside context / total abnormal
     for factor in factors:
@@ -297,26 +387,16 @@ def compute_pareto_attribution(
             penalty = 1.0 - excess
             raw_scores[factor.key] *= penalty
 
-    # Re-check after penalties
-    total_score = sum(raw_scores.values())
-    if total_score <= 0.0:
-        return ParetoResult(
-            factors_ranked=[],
-            dominant_key=None,
-            meta={
-                "reason": "all_penalized_as_noise",
-                "dip_count": len(all_dips),
-                "max_lag_days": constants.max_lag_days,
-            },
-        )
-
     # --- Consistency windows: require relationship to recur across time ---
-    dip_dates_sorted = sorted([d.date for d in all_dips])
+    # dips_result.all is chronological already; sort only if a caller passed otherwise
+    if np.any(dip_offsets[1:] < dip_offsets[:-1]):
+        by_date = np.argsort(dip_offsets, kind="stable")
+        dip_offsets, contributed_by_dip = dip_offsets[by_date], contributed_by_dip[by_date]
     consistent_ok: Set[str] = set()
-    for factor in factors:
+    for k, factor in enumerate(factors):
         w = _count_consistent_windows(
-            dip_dates=dip_dates_sorted,
-            contributing_dates=contributed_to_dip_dates[factor.key],
+            dip_offsets=dip_offsets,
+            contributed=contributed_by_dip[:, k],
             days_window=constants.baseline_days_window,
         )
         if w >= constants.min_consistent_windows:
@@ -326,8 +406,21 @@ def compute_pareto_attribution(
             # Conservative choice: downweight hard.
             raw_scores[factor.key] *= 0.5
 
-    # Normalize to percentages
+    # Scores are never negative and the consistency downweight only halves them,
+    # so one total after all penalties decides both "all penalized" and percentages
     total_score = sum(raw_scores.values())
+    if total_score <= 0.0:
+        return ParetoResult(
+            factors_ranked=[],
+            dominant_key=None,
+            meta={
+                "reason": "all_penalized_as_noise",
+                "dip_count": len(all_dips),
+                "max_lag_days": constants.max_lag_days,
+            },
+        )
+
+    # Normalize to percentages
     ranked = sorted(raw_scores.items(), key=lambda kv: kv[1], reverse=True)
 
     # Build FactorAttribution objects
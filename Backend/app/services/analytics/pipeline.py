@@ -13,18 +13,17 @@ This file glues together:
 
 from __future__ import annotations
 
-from dataclasses import asdict
 from typing import Dict, List, Optional
 
 from app.domain.config import AnalysisAssumptions
 from app.domain.daily_record import DailyRecord
-from app.services.analytics.baselines import compute_individual_baselines, compute_cumulative_baselines
+from app.services.analytics.baselines import METRIC_INDEX, compute_cumulative_baselines, pack_baselines
 from app.services.analytics.dips import detect_recovery_dips, DipThresholds, DipDetectionResult
 from app.services.analytics.pareto_calculation import compute_pareto_attribution, AttributionThresholds, ParetoResult
 from app.services.analytics.stability import is_stable_recovery, StabilityResult
-from app.services.analytics.insights import build_insight, extract_latest_values, Insight
-from app.services.analytics.evidence import build_timeseries
-from app.services.ingest.store import load_user_records  
+from app.services.analytics.insights import build_insight, insight_to_dict, latest_values_from_matrix, Insight
+from app.services.analytics.evidence import build_timeseries_columns
+from app.services.ingest.store import load_user_frame
 
 
 def run_pipeline(
@@ -33,74 +32,81 @@ def run_pipeline(
     days_window: Optional[int] = None,
     dip_thresholds: DipThresholds = DipThresholds(),
     abnormal_thresholds: AttributionThresholds = AttributionThresholds(),
+    include_debug: bool = False,
 ) -> Dict:
     """
     Returns a dict with:
       - summary: Pareto + insight + meta
-      - timeseries: daily evidence series
-      - debug: optional internal details (safe to omit in production)
+      - timeseries: daily evidence series, columnar (one list per field)
+      - debug: internal details when include_debug=True, else None
 
     days_window defaults to constants.min_history_days if not provided.
     """
     if days_window is None:
         days_window = constants.min_history_days
 
-    records: List[DailyRecord] = load_user_records(user_id)
-    records = sorted(records, key=lambda r: r.date)
+    # Window the data for analysis: the store returns the trailing window, date-ordered
+    frame = load_user_frame(user_id, limit=days_window)
+    records_w: List[DailyRecord] = list(frame.records)
 
-    # Window the data for analysis
-    if len(records) > days_window:
-        records_w = records[-days_window:]
-    else:
-        records_w = records
+    # Columnar view of the window (built by the store), shared by the stages below
+    matrix = frame.matrix
 
     baselines = compute_cumulative_baselines(
         records=records_w,
         days_window=constants.baseline_days_window,  
+        matrix=matrix,
     )
 
     recovery_baseline = baselines["recovery_value"]
-
-    dips_all = detect_recovery_dips(
-        records=records_w,
-        recovery_baseline=recovery_baseline,
-        constants=constants,
-        thresholds=dip_thresholds,
-    )
-
-    if isinstance(dips_all, list):
-        # Back-compat adapter: split by kind (large vs persistent) and dedupe into all
-        large = [d for d in dips_all if d.kind == "large"]
-        persistent = [d for d in dips_all if d.kind == "persistent"]
-        # Dedup large-preferred for "all"
-        by_date = {}
-        for d in persistent:
-            by_date[d.date] = d
-        for d in large:
-            by_date[d.date] = d
-        dips_result = DipDetectionResult(large=large, persistent=persistent, all=[by_date[k] for k in sorted(by_date)])
+    # Column arrays of the same baselines for the matrix-wide z-scoring stages
+    baseline_pack = pack_baselines(baselines)
+
+    if len(records_w) < constants.min_history_days:
+        # Every analytics stage gates on this; skip them and report the gate once.
+        # Baselines are still needed for the evidence timeseries below.
+        dips_result = DipDetectionResult(large=[], persistent=[])
+        stability = StabilityResult(
+            stable=False,
+            meta={"reason": "insufficient_history", "history_days": len(records_w)},
+        )
+        pareto = ParetoResult(
+            factors_ranked=[],
+            dominant_key=None,
+            meta={"reason": "insufficient_history", "history_days": len(records_w)},
+        )
     else:
-        dips_result = dips_all  # type: ignore
-
-    # Stability evaluation 
-    stability: StabilityResult = is_stable_recovery(
-        records=records_w,
-        recovery_baseline=recovery_baseline,
-        dip_count=len(dips_result.all),
-        constants=constants,
-    )
-
-    # Pareto attribution (only meaningful if not stable; still safe to run either way)
-    pareto: ParetoResult = compute_pareto_attribution(
-        records=records_w,
-        dips_result=dips_result,
-        baselines=baselines,
-        constants=constants,
-        thresholds=abnormal_thresholds,
-    )
+        dips_all = detect_recovery_dips(
+            records=records_w,
+            recovery_baseline=recovery_baseline,
+            constants=constants,
+            thresholds=dip_thresholds,
+            matrix=matrix,
+        )
+
+        dips_result = DipDetectionResult.from_events(dips_all)
+
+        # Stability evaluation 
+        stability: StabilityResult = is_stable_recovery(
+            records=records_w,
+            recovery_baseline=recovery_baseline,
+            dip_count=len(dips_result.all),
+            constants=constants,
+            recovery_values=matrix[:, METRIC_INDEX["recovery_value"]],
+        )
+
+        # Pareto attribution (only meaningful if not stable; still safe to run either way)
+        pareto: ParetoResult = compute_pareto_attribution(
+            records=records_w,
+            dips_result=dips_result,
+            baselines=baseline_pack,
+            constants=constants,
+            thresholds=abnormal_thresholds,
+            matrix=matrix,
+        )
 
     # Insight generation
-    latest_values = extract_latest_values(records_w)
+    latest_values = latest_values_from_matrix(matrix)
     insight: Insight = build_insight(
         pareto=pareto,
         dips_result=dips_result,
@@ -111,13 +117,14 @@ def run_pipeline(
         resources_by_factor=None, 
     )
 
-    # Evidence timeseries for UI
-    timeseries = build_timeseries(
+    # Evidence timeseries for UI (columnar; see evidence.timeseries_rows)
+    timeseries = build_timeseries_columns(
         records=records_w,
         dips_result=dips_result,
-        baselines=baselines,
+        baselines=baseline_pack,
         pareto=pareto,
         thresholds=abnormal_thresholds,
+        matrix=matrix,
     )
 
     summary = {
@@ -129,7 +136,7 @@ def run_pipeline(
             for d in pareto.factors_ranked
         ],
         "dominant_key": pareto.dominant_key,
-        "insight": asdict(insight),
+        "insight": insight_to_dict(insight),
         "meta": {
             "stability": stability.meta,
             "pareto": pareto.meta,
@@ -139,22 +146,25 @@ def run_pipeline(
         },
     }
 
-    debug = {
-        "latest_values": latest_values,
-        "baselines": {
-            k: {"mean": v.mean, "std": v.std, "n": v.n} for k, v in baselines.items()
-        },
-        "dips": [
-            {
-                "date": d.date.isoformat(),
-                "kind": d.kind,
-                "recovery_value": d.recovery_value,
-                "baseline_mean": d.baseline_mean,
-                "z": d.z,
-                "magnitude": d.magnitude,
-            }
-            for d in dips_result.all
-        ],
-    }
+    # Internal details are only built on request; production callers skip them
+    debug: Optional[Dict] = None
+    if include_debug:
+        debug = {
+            "latest_values": latest_values,
+            "baselines": {
+                k: {"mean": v.mean, "std": v.std, "n": v.n} for k, v in baselines.items()
+            },
+            "dips": [
+                {
+                    "date": d.date.isoformat(),
+                    "kind": d.kind,
+                    "recovery_value": d.recovery_value,
+                    "baseline_mean": d.baseline_mean,
+                    "z": d.z,
+                    "magnitude": d.magnitude,
+                }
+                for d in dips_result.all
+            ],
+        }
 
     return {"summary": summary, "timeseries": timeseries, "debug": debug}
@@ -0,0 +1,76 @@
+"""
+Last-computed pipeline results, keyed by (user_id, days_window).
+
+Routes read from here instead of running the pipeline on every request:
+- fresh snapshot (matches the store's data version): returned as-is
+- stale snapshot (records changed since): returned as-is, and the caller
+  schedules refresh() in the background (stale-while-revalidate)
+- no snapshot: computed inline once
+
+This is intentionally in-process and replaceable with Redis later.
+"""
+
+from __future__ import annotations
+
+from threading import Lock
+from typing import Dict, Optional, Set, Tuple
+
+from app.services.analytics.pipeline import run_pipeline
+from app.services.ingest.store import DataVersion, data_version
+
+MAX_SNAPSHOTS = 256
+
+Key = Tuple[str, int]
+
+# key -> (data version the result was computed from, pipeline result)
+_SNAPSHOTS: Dict[Key, Tuple[DataVersion, Dict]] = {}
+_REFRESHING: Set[Key] = set()
+_LOCK = Lock()
+
+
+def put(user_id: str, days_window: int, result: Dict, version: DataVersion) -> None:
+    key = (user_id, days_window)
+    with _LOCK:
+        _SNAPSHOTS.pop(key, None)
+        _SNAPSHOTS[key] = (version, result)
+        # Dicts keep insertion order, so the first key is the least recently written
+        while len(_SNAPSHOTS) > MAX_SNAPSHOTS:
+            _SNAPSHOTS.pop(next(iter(_SNAPSHOTS)))
+
+
+def get(user_id: str, days_window: int) -> Tuple[Optional[Dict], bool]:
+    """
+    Returns (result, is_fresh). result is None when nothing was computed yet.
+    """
+    entry = _SNAPSHOTS.get((user_id, days_window))
+    if entry is None:
+        return (None, False)
+    version, result = entry
+    return (result, version == data_version(user_id))
+
+
+def compute(user_id: str, days_window: int) -> Dict:
+    """Run the pipeline now and store the result."""
+    version = data_version(user_id)
+    result = run_pipeline(user_id=user_id, days_window=days_window)
+    put(user_id, days_window, result, version)
+    return result
+
+
+def refresh(user_id: str, days_window: int) -> None:
+    """Background recompute; concurrent refreshes of the same key collapse into one."""
+    key = (user_id, days_window)
+    with _LOCK:
+        if key in _REFRESHING:
+            return
+        _REFRESHING.add(key)
+    try:
+        compute(user_id, days_window)
+    finally:
+        with _LOCK:
+            _REFRESHING.discard(key)
+
+
+def clear() -> None:
+    with _LOCK:
+        _SNAPSHOTS.clear()
@@ -1,6 +1,7 @@
 """
 This module decides whether recovery has been "stable" over the analysis window.
-Stable means: low variability and few/no meaningful dip events.
+Stable means: low variability (overall and within any short window) and
+few/no meaningful dip events.
 
 This is a valid outcome (not an error). If stable=True, the system should avoid
 ranking factors as "dominant" because there's little recovery breakdown to explain.
@@ -9,62 +10,131 @@ ranking factors as "dominant" because there's little recovery breakdown to expla
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 from app.domain.daily_record import DailyRecord
 from app.domain.config import AnalysisAssumptions  
-from app.services.analytics.baselines import BaselineStats
+from app.services.analytics.baselines import BaselineStats, metric_column
+from app.services.analytics._kernels import welford
+
 
+# Intentionally conservative- tune later if needed.
+_CV_THRESHOLD = 0.08
+_ALLOWED_DIPS = 0  # definition for stable
+# Local swing gate: within any _WINDOW_DAYS observed days, max/min recovery
+# may not exceed this ratio (catches short swings a global CV averages out)
+_WINDOW_DAYS = 7
+_WINDOW_RATIO_THRESHOLD = 1.25
 
-@dataclass(frozen=True)
+
+# Built once per call and only read afterwards; slots keeps it small
+# without the frozen per-field object.__setattr__ in __init__
+@dataclass(slots=True)
 class StabilityResult:
     stable: bool
     meta: Dict[str, object]
 
 
-def _collect_recovery_values(records: List[DailyRecord]) -> List[float]:
-    xs: List[float] = []
-    for r in records:
-        if r.recovery_value is None:
-            continue
-        try:
-            xs.append(float(r.recovery_value))
-        except (TypeError, ValueError):
-            continue
-    return xs
+def _collect_recovery_values(
+    records: List[DailyRecord],
+    window: Optional[int] = None,
+    values: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Observed recovery values as float64, missing days dropped. With
+    `window`, only the last `window` records are read. `values` may carry
+    the records' recovery column (NaN = missing) when the caller has it.
+    """
+    if values is None:
+        if window is not None and window < len(records):
+            # Slice of references only; older history is never touched
+            records = records[-window:] if window > 0 else []
+        # Preallocated column (NaN for missing), then one mask
+        values = metric_column(records, "recovery_value")
+    elif window is not None and window < values.shape[0]:
+        values = values[-window:] if window > 0 else values[:0]
+    return values[~np.isnan(values)]
+
+
+def _sliding_ratio(
+    xs: np.ndarray,
+    window: int = _WINDOW_DAYS,
+) -> Optional[float]:
+    """
+    Largest max/min ratio over every run of `window` consecutive values
+    (recovery scores, so positive). None when there are fewer than `window`
+    values. A window touching 0 counts as an unbounded swing.
+    """
+    if xs.shape[0] < window:
+        return None
+    views = sliding_window_view(xs, window)
+    hi = views.max(axis=1)
+    lo = views.min(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = np.where(hi == lo, 1.0, hi / lo)
+    return float(ratios.max())
+
+
+def recovery_stats(records: List[DailyRecord], window: Optional[int] = None) -> BaselineStats:
+    """
+    Population mean/std of the records' recovery values (one Welford pass),
+    optionally over the last `window` records only.
+    """
+    mean, std, n = welford(_collect_recovery_values(records, window))
+    if n == 0:
+        return BaselineStats(mean=None, std=None, n=0)
+    return BaselineStats(mean=float(mean), std=float(std), n=int(n))
 
 
 def is_stable_recovery(
     records: List[DailyRecord],
-    recovery_baseline: BaselineStats,
+    recovery_baseline: Optional[BaselineStats],
     dip_count: int,
     constants: AnalysisAssumptions,
+    recovery_values: Optional[np.ndarray] = None,
 ) -> StabilityResult:
     """
     Returns:
     - StabilityResult(stable=bool, meta=dict)
+
+    Pass recovery_baseline=None to derive it from `records` instead of a
+    precomputed baseline window. The swing gate covers the same span as the
+    baseline: the trailing constants.baseline_days_window records for a
+    precomputed one, all records for a derived one. `recovery_values` may
+    carry the records' recovery column (NaN = missing) to skip re-reading it.
     """
     # Gate: enough history
-    if len(records) < constants.min_history_days:
+    n_recs = len(records)
+    if n_recs < constants.min_history_days:
         return StabilityResult(
             stable=False,
-            meta={"reason": "insufficient_history", "history_days": len(records)},
+            meta={"reason": "insufficient_history", "history_days": n_recs},
         )
 
-    if recovery_baseline.mean is None or recovery_baseline.std is None or recovery_baseline.n == 0:
+    swing_window: Optional[int] = constants.baseline_days_window
+    if recovery_baseline is None:
+        recovery_baseline = recovery_stats(records)
+        swing_window = None
+
+    # Read the baseline once; the gates below and the CV use the locals
+    mean, std, n = recovery_baseline.mean, recovery_baseline.std, recovery_baseline.n
+    if mean is None or std is None or n == 0:
         return StabilityResult(
             stable=False,
             meta={"reason": "missing_recovery_baseline"},
         )
 
-    if recovery_baseline.n < constants.min_observations:
+    if n < constants.min_observations:
         return StabilityResult(
             stable=False,
-            meta={"reason": "insufficient_recovery_observations", "n": recovery_baseline.n},
+            meta={"reason": "insufficient_recovery_observations", "n": n},
         )
 
-    mu = float(recovery_baseline.mean)
-    sd = float(recovery_baseline.std)
+    mu = float(mean)
+    sd = float(std)
 
     # Coefficient of variation (std/mean) as a scale-free stability measure
     # If mean is ~0, fall back to raw std comparison.
@@ -73,14 +143,13 @@ def is_stable_recovery(
     else:
         cv = abs(sd / mu)
 
-    # Intentionally conservative- tune later if needed.
-    cv_threshold = 0.08
-    allowed_dips = 0  # definition for stable
+    stable_by_variance = (cv is not None and cv <= _CV_THRESHOLD) or (cv is None and sd == 0.0)
+    stable_by_dips = dip_count <= _ALLOWED_DIPS
 
-    stable_by_variance = (cv is not None and cv <= cv_threshold) or (cv is None and sd == 0.0)
-    stable_by_dips = dip_count <= allowed_dips
+    window_ratio = _sliding_ratio(_collect_recovery_values(records, swing_window, recovery_values))
+    stable_by_window = window_ratio is None or window_ratio <= _WINDOW_RATIO_THRESHOLD
 
-    stable = stable_by_variance and stable_by_dips
+    stable = stable_by_variance and stable_by_dips and stable_by_window
 
     return StabilityResult(
         stable=stable,
@@ -88,10 +157,13 @@ def is_stable_recovery(
             "recovery_mean": mu,
             "recovery_std": sd,
             "recovery_cv": cv,
-            "cv_threshold": cv_threshold,
+            "cv_threshold": _CV_THRESHOLD,
             "dip_count": dip_count,
-            "allowed_dips": allowed_dips,
+            "allowed_dips": _ALLOWED_DIPS,
             "stable_by_variance": stable_by_variance,
             "stable_by_dips": stable_by_dips,
+            "max_window_ratio": window_ratio,
+            "window_ratio_threshold": _WINDOW_RATIO_THRESHOLD,
+            "stable_by_window": stable_by_window,
         },
     )
@@ -8,17 +8,80 @@ This is intentionally minimal and replaceable with a real DB later.
 from __future__ import annotations
 
 import json
-from dataclasses import asdict
 from datetime import date
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import attrgetter
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+import numpy as np
 
 from app.domain.daily_record import DailyRecord
+from app.domain.metrics import records_to_matrix
+
+try:  # C JSON parser/serializer; stdlib json is used without it
+    import orjson
+
+    def _loads(data: bytes):
+        return orjson.loads(data)
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:  # pragma: no cover - depends on environment
+    def _loads(data: bytes):
+        return json.loads(data)
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, indent=2).encode("utf-8")
+
+try:  # incremental parser; only used for very large seed files
+    import ijson
+except ImportError:  # pragma: no cover - depends on environment
+    ijson = None
+
+# Seed files at least this large are streamed record by record (with ijson)
+# rather than parsed into one JSON tree first
+_STREAM_MIN_BYTES = 8 * 1024 * 1024
+
+
+@dataclass(frozen=True, slots=True)
+class _UserFrame:
+    """
+    One user's date-ordered records plus their columnar form, built once
+    on save/load so analytics callers never re-walk the record objects.
+    """
+    records: Tuple[DailyRecord, ...]
+    matrix: np.ndarray  # records_to_matrix(records): METRIC_KEYS columns, NaN = missing
+
+    def tail(self, limit: int) -> "_UserFrame":
+        """The most recent `limit` days (views, no copies)."""
+        if limit >= len(self.records):
+            return self
+        return _UserFrame(self.records[-limit:], self.matrix[-limit:])
+
+
+def _frame_from_records(records: List[DailyRecord]) -> _UserFrame:
+    """Columnar frame of already date-ordered records; the matrix is read-only (shared)."""
+    matrix = records_to_matrix(records)
+    matrix.flags.writeable = False
+    return _UserFrame(records=tuple(records), matrix=matrix)
+
+
+_BY_DATE = attrgetter("date")
 
 # In-memory override store 
-_IN_MEMORY: Dict[str, List[DailyRecord]] = {}
+_IN_MEMORY: Dict[str, _UserFrame] = {}
+
+# Bumped on every write so cached analytics can tell when data changed
+_VERSIONS: Dict[str, int] = {}
+
+# See data_version()
+DataVersion = Tuple[int, int]
 
 
+# The layout cannot change at runtime, so resolve (a realpath syscall) once
+@lru_cache(maxsize=1)
 def _project_root() -> Path:
     """
     Finds project root assuming this file lives at:
@@ -27,6 +90,7 @@ def _project_root() -> Path:
     return Path(__file__).resolve().parents[3]
 
 
+@lru_cache(maxsize=1)
 def _data_dir() -> Path:
     return _project_root() / "data"
 
@@ -45,41 +109,125 @@ def _safe_float(v) -> Optional[float]:
         return None
 
 
-# Convert json into Daily Record
-def _record_from_dict(obj: dict) -> DailyRecord:
+# Convert json into Daily Record.
+# Runs once per seed row: helpers are bound as defaults and already-float
+# values (the common case) skip the _safe_float call.
+def _record_from_dict(obj: dict, _sf=_safe_float, _pd=_parse_date) -> DailyRecord:
+    get = obj.get
+    rec = get("recovery_value")
+    sleep = get("sleep_duration")
+    cons = get("sleep_consistency")
+    ex = get("excercise_data_point")
+    nut = get("nutrition_data_point")
     return DailyRecord(
-        date=_parse_date(obj["date"]),
-        recovery_value=_safe_float(obj.get("recovery_value")),
-        sleep_duration=_safe_float(obj.get("sleep_duration")),
-        sleep_consistency=_safe_float(obj.get("sleep_consistency")),
-        excercise_data_point=_safe_float(obj.get("excercise_data_point")),
-        nutrition_data_point=_safe_float(obj.get("nutrition_data_point")),
-        sources=obj.get("sources"),
+        date=_pd(obj["date"]),
+        recovery_value=rec if type(rec) is float else _sf(rec),
+        sleep_duration=sleep if type(sleep) is float else _sf(sleep),
+        sleep_consistency=cons if type(cons) is float else _sf(cons),
+        excercise_data_point=ex if type(ex) is float else _sf(ex),
+        nutrition_data_point=nut if type(nut) is float else _sf(nut),
+        sources=get("sources"),
     )
 
 
-def load_user_records(user_id: str) -> List[DailyRecord]:
-    if user_id in _IN_MEMORY:
-        return sorted(_IN_MEMORY[user_id], key=lambda r: r.date)
+# Convert Daily Record into json (inverse of _record_from_dict)
+def _record_to_json(r: DailyRecord) -> dict:
+    return {
+        "date": r.date.isoformat(),
+        "recovery_value": r.recovery_value,
+        "sleep_duration": r.sleep_duration,
+        "sleep_consistency": r.sleep_consistency,
+        "excercise_data_point": r.excercise_data_point,
+        "nutrition_data_point": r.nutrition_data_point,
+        "sources": r.sources,
+    }
+
+
+def _ensure_sorted(recs: List[DailyRecord]) -> List[DailyRecord]:
+    """
+    Date-orders `recs` in place (callers pass a list they own) and returns
+    it; an O(n) check skips the sort when it is already ordered.
+    """
+    if not all(a.date <= b.date for a, b in zip(recs, recs[1:])):
+        recs.sort(key=_BY_DATE)
+    return recs
+
 
+@lru_cache(maxsize=32)
+def _load_seed(path_str: str, mtime_ns: int) -> _UserFrame:
+    """
+    Parsed, date-ordered contents of one seed file. Keyed on the file's
+    mtime so an edited file is re-read; `mtime_ns` is only part of the key.
+    """
+    path = Path(path_str)
+    records: Optional[List[DailyRecord]] = None
+    if ijson is not None and path.stat().st_size >= _STREAM_MIN_BYTES:
+        with path.open("rb") as f:
+            if _opens_json_list(f):
+                records = [
+                    _record_from_dict(item) for item in ijson.items(f, "item", use_float=True)
+                ]
+    else:
+        raw = _loads(path.read_bytes())
+        if isinstance(raw, list):
+            records = [_record_from_dict(item) for item in raw]
+
+    if records is None:
+        raise ValueError(f"Seed file must contain a JSON list of daily records: {path}")
+    return _frame_from_records(_ensure_sorted(records))
+
+
+def _opens_json_list(f: BinaryIO) -> bool:
+    """
+    Whether the stream's first non-whitespace byte opens a JSON array, so
+    streamed seeds get the same top-level check as parsed ones. Rewinds `f`.
+    """
+    ch = f.read(1)
+    while ch.isspace():
+        ch = f.read(1)
+    f.seek(0)
+    return ch == b"["
+
+
+def _seed_path(user_id: str) -> Path:
+    """The user's seed file, else the shared fallback (which may not exist either)."""
     data_dir = _data_dir()
     candidate = data_dir / f"seed_{user_id}.json"
-    fallback = data_dir / "seed_sleep1.json"
+    return candidate if candidate.exists() else data_dir / "seed_sleep1.json"
 
-    path = candidate if candidate.exists() else fallback
-    if not path.exists():
-        raise FileNotFoundError(
-            f"No seed data found. Expected {candidate} or {fallback}."
-        )
 
-    with path.open("r", encoding="utf-8") as f:
-        raw = json.load(f)
+def load_user_frame(user_id: str, limit: Optional[int] = None) -> _UserFrame:
+    """
+    The user's records in date order together with their columnar form.
+    With `limit`, only the most recent `limit` days (still oldest first),
+    so callers that analyze a trailing window never sort or copy the full
+    history.
+    """
+    if limit is not None and limit <= 0:
+        raise ValueError("limit must be > 0")
 
-    if not isinstance(raw, list):
-        raise ValueError(f"Seed file must contain a JSON list of daily records: {path}")
+    frame = _IN_MEMORY.get(user_id)
+    if frame is None:
+        path = _seed_path(user_id)
+        if not path.exists():
+            raise FileNotFoundError(
+                f"No seed data found. Expected {_data_dir() / f'seed_{user_id}.json'} or {path}."
+            )
 
-    records = [_record_from_dict(item) for item in raw]
-    return sorted(records, key=lambda r: r.date)
+        # Parsed once per file version
+        frame = _load_seed(str(path), path.stat().st_mtime_ns)
+
+    # Frames are date-ordered, so the window is a tail slice
+    return frame if limit is None else frame.tail(limit)
+
+
+def load_user_records(user_id: str, limit: Optional[int] = None) -> List[DailyRecord]:
+    """
+    The user's records in date order (see load_user_frame for `limit`).
+    The list is the caller's; the (frozen) records in it are shared with
+    the store's cache.
+    """
+    return list(load_user_frame(user_id, limit).records)
 
 
 def save_user_records(user_id: str, records: List[DailyRecord]) -> None:
@@ -87,12 +235,29 @@ def save_user_records(user_id: str, records: List[DailyRecord]) -> None:
     Save into in-memory store for the current process.
     (Great for hackathon demos; no DB required.)
     """
-    _IN_MEMORY[user_id] = sorted(records, key=lambda r: r.date)
+    _IN_MEMORY[user_id] = _frame_from_records(_ensure_sorted(list(records)))
+    _VERSIONS[user_id] = _VERSIONS.get(user_id, 0) + 1
 
 
 def clear_user_records(user_id: str) -> None:
     """Remove in-memory override for user."""
     _IN_MEMORY.pop(user_id, None)
+    _VERSIONS[user_id] = _VERSIONS.get(user_id, 0) + 1
+
+
+def data_version(user_id: str) -> DataVersion:
+    """
+    Token that changes whenever the user's records change:
+    (in-memory write counter, mtime_ns of the seed file served otherwise).
+    The mtime is 0 while an in-memory override is active.
+    """
+    if user_id in _IN_MEMORY:
+        return (_VERSIONS.get(user_id, 0), 0)
+    try:
+        mtime_ns = _seed_path(user_id).stat().st_mtime_ns
+    except OSError:
+        mtime_ns = 0
+    return (_VERSIONS.get(user_id, 0), mtime_ns)
 
 
 def export_user_records_to_seed(user_id: str, filename: Optional[str] = None) -> Path:
@@ -105,14 +270,11 @@ def export_user_records_to_seed(user_id: str, filename: Optional[str] = None) ->
     out_name = filename or f"seed_{user_id}.json"
     out_path = data_dir / out_name
 
-    payload = []
-    for r in _IN_MEMORY[user_id]:
-        d = asdict(r)
-        d["date"] = r.date.isoformat()
-        payload.append(d)
+    payload = [_record_to_json(r) for r in _IN_MEMORY[user_id].records]
 
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=2)
+    out_path.write_bytes(_dumps(payload))
+    # The file may be rewritten within the mtime resolution; drop parsed copies
+    _load_seed.cache_clear()
 
     return out_path
 
@@ -1,10 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import uvicorn
 
 from app.api.routes_health import router as health_router
 
-app = FastAPI(title="PhysioLens Backend", version="0.1.0")
+app = FastAPI(
+    title="PhysioLens Backend",
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
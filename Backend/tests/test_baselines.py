@@ -1,12 +1,17 @@
+import numpy as np
 import pytest
 from dataclasses import dataclass
 from typing import Optional, List
 
 from app.services.analytics.baselines import (
     BaselineStats,
+    RollingStats,
     compute_individual_baselines,
     compute_cumulative_baselines,
+    pack_baselines,
+    records_to_matrix,
     z_score,
+    z_score_matrix,
 )
 
 @dataclass
@@ -95,3 +100,81 @@ def test_compute_cumulative_baselines_default_keys_present():
 
     assert out["recovery_value"].n == 2
     assert out["sleep_duration"].n == 1  # one None ignored
+
+
+def test_compute_cumulative_baselines_matches_individual_baselines():
+    records = [
+        DummyRecord(recovery_value=50 + i, sleep_duration=(7 + i * 0.1) if i % 3 else None)
+        for i in range(10)
+    ]
+
+    out = compute_cumulative_baselines(records, days_window=7)
+
+    for key, stats in out.items():
+        expected = compute_individual_baselines(records, key, days_window=7)
+        assert stats.n == expected.n
+        if expected.n == 0:
+            assert stats.mean is None and stats.std is None
+        else:
+            assert stats.mean == pytest.approx(expected.mean, abs=1e-9)
+            assert stats.std == pytest.approx(expected.std, abs=1e-9)
+
+
+def test_z_score_matrix_matches_scalar_z_score():
+    records = [
+        DummyRecord(recovery_value=40, sleep_duration=5.0),
+        DummyRecord(recovery_value=None, sleep_duration=5.0000001),
+        DummyRecord(recovery_value=60, sleep_duration=None),
+    ]
+    baselines = {
+        "recovery_value": BaselineStats(mean=50.0, std=5.0, n=10),
+        "sleep_duration": BaselineStats(mean=5.0, std=0.0, n=10),
+    }
+
+    z = z_score_matrix(records_to_matrix(records), baselines)
+
+    assert z[0, 0] == pytest.approx(-2.0)
+    assert z[2, 0] == pytest.approx(2.0)
+    assert z[0, 1] == 0.0          # std=0, value equals mean
+    assert np.isnan(z[1, 1])       # std=0, value differs -> not computable
+    assert np.isnan(z[1, 0])       # missing value
+    assert np.isnan(z[:, 2:]).all()  # no baseline for remaining metrics
+
+
+def test_z_score_matrix_accepts_prebuilt_pack():
+    records = [
+        DummyRecord(recovery_value=40, sleep_duration=5.0),
+        DummyRecord(recovery_value=None, sleep_duration=5.0000001),
+        DummyRecord(recovery_value=60, sleep_duration=None),
+    ]
+    baselines = {
+        "recovery_value": BaselineStats(mean=50.0, std=5.0, n=10),
+        "sleep_duration": BaselineStats(mean=5.0, std=0.0, n=10),
+    }
+    matrix = records_to_matrix(records)
+
+    pack = pack_baselines(baselines)
+
+    assert pack.field_index["sleep_duration"] == 1
+    assert np.array_equal(z_score_matrix(matrix, pack), z_score_matrix(matrix, baselines), equal_nan=True)
+
+
+def test_rolling_stats_matches_recomputed_window_when_sliding():
+    values = [50.0, 61.0, None, 47.5, 55.0, 70.0, None, 52.0, 58.0, 49.0]
+    records = [DummyRecord(recovery_value=v) for v in values]
+    window = 4
+
+    rolling = RollingStats()
+    for i, v in enumerate(values):
+        rolling.push(v)
+        if i >= window:
+            rolling.pop(values[i - window])
+
+        got = rolling.stats()
+        expected = compute_individual_baselines(records[: i + 1], "recovery_value", days_window=window)
+        assert got.n == expected.n
+        if expected.n == 0:
+            assert got.mean is None and got.std is None
+        else:
+            assert got.mean == pytest.approx(expected.mean, abs=1e-9)
+            assert got.std == pytest.approx(expected.std, abs=1e-9)
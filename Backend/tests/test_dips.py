@@ -1,9 +1,16 @@
+import numpy as np
 import pytest
 from dataclasses import dataclass
 from datetime import date, timedelta
 from typing import Optional, List
 
-from app.services.analytics.dips import detect_recovery_dips, DipThresholds
+from app.services.analytics.dips import (
+    detect_recovery_dips,
+    DipDetectionResult,
+    DipThresholds,
+    _scan_dip_kinds_loop,
+    _scan_dip_kinds_numpy,
+)
 from app.services.analytics.baselines import BaselineStats
 
 
@@ -86,3 +93,64 @@ def test_detect_recovery_dips_missing_recovery_breaks_persistent_run():
 
     assert [e.date for e in out] == [date(2026, 1, 3), date(2026, 1, 4)]
     assert all(e.kind == "persistent" for e in out)
+
+
+def test_detect_dips_keeps_one_event_per_repeated_date():
+    """
+    Jan 1 repeats with a persistent row then two large rows -> the first large wins.
+    Jan 2 repeats with two persistent rows -> the first one wins.
+    """
+    jan1, jan2 = date(2026, 1, 1), date(2026, 1, 2)
+    records = [
+        DummyRecord(date=jan1, recovery_value=92.0),
+        DummyRecord(date=jan1, recovery_value=80.0),
+        DummyRecord(date=jan1, recovery_value=70.0),
+        DummyRecord(date=jan2, recovery_value=92.0),
+        DummyRecord(date=jan2, recovery_value=91.0),
+    ]
+    baseline = BaselineStats(mean=100.0, std=10.0, n=10)
+    constants = DummyAssumptions(min_history_days=1, min_observations=1)
+
+    out = detect_recovery_dips(records, baseline, constants, thresholds=DipThresholds(persistent_days=2))
+
+    assert [(e.date, e.kind, e.recovery_value) for e in out] == [
+        (jan1, "large", 80.0),
+        (jan2, "persistent", 92.0),
+    ]
+
+
+def test_dip_detection_result_kind_by_date_prefers_large():
+    records = _mk_records([92.0, 87.0, 92.0], start=date(2026, 1, 1))
+    baseline = BaselineStats(mean=100.0, std=10.0, n=10)
+    constants = DummyAssumptions(min_history_days=1, min_observations=1)
+
+    events = detect_recovery_dips(records, baseline, constants)
+    result = DipDetectionResult.from_events(events)
+
+    assert result.kind_by_date == {
+        date(2026, 1, 1): "persistent",
+        date(2026, 1, 2): "large",
+        date(2026, 1, 3): "persistent",
+    }
+    assert [e.date for e in result.large] == [date(2026, 1, 2)]
+    assert len(result.persistent) == 2
+
+    # Constructing directly derives the same lookup
+    direct = DipDetectionResult(large=result.large, persistent=result.persistent, all=result.all)
+    assert direct.kind_by_date == result.kind_by_date
+
+    # Omitting `all` derives it from the kind lists, in date order
+    derived = DipDetectionResult(large=result.large, persistent=result.persistent)
+    assert derived.all == result.all
+
+
+@pytest.mark.parametrize("persistent_days", [1, 2, 3])
+def test_scan_dip_kinds_numpy_matches_loop(persistent_days):
+    rng = np.random.default_rng(0)
+    z = rng.normal(-0.5, 1.0, size=200)
+    z[rng.random(200) < 0.1] = np.nan  # missing days break runs
+
+    loop = _scan_dip_kinds_loop(z, -1.25, -0.75, persistent_days)
+    vec = _scan_dip_kinds_numpy(z, -1.25, -0.75, persistent_days)
+
+    assert np.array_equal(loop, vec)
@@ -0,0 +1,95 @@
+import pytest
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional
+
+from app.services.analytics.baselines import BaselineStats
+from app.services.analytics.dips import DipEvent, DipDetectionResult
+from app.services.analytics.evidence import _iso_dates, build_timeseries, build_timeseries_columns, timeseries_rows
+
+
+@dataclass
+class DummyRecord:
+    date: date
+    recovery_value: Optional[float] = None
+    sleep_duration: Optional[float] = None
+    sleep_consistency: Optional[float] = None
+    excercise_data_point: Optional[float] = None
+    nutrition_data_point: Optional[float] = None
+
+
+BASELINES = {
+    "recovery_value": BaselineStats(mean=80.0, std=5.0, n=30),
+    "sleep_duration": BaselineStats(mean=8.0, std=1.0, n=30),
+    "sleep_consistency": BaselineStats(mean=0.8, std=0.1, n=30),
+    "excercise_data_point": BaselineStats(mean=500.0, std=50.0, n=30),
+    "nutrition_data_point": BaselineStats(mean=2000.0, std=0.0, n=30),
+}
+
+
+def _mk_dip(date_: date, kind: str) -> DipEvent:
+    return DipEvent(date=date_, recovery_value=60.0, baseline_mean=80.0, z=-4.0, magnitude=20.0, kind=kind)
+
+
+def test_build_timeseries_flags_dips_and_abnormal_factors():
+    start = date(2026, 1, 1)
+    records = [
+        DummyRecord(date=start, recovery_value=80.0, sleep_duration=5.0, sleep_consistency=0.8),
+        DummyRecord(date=start + timedelta(days=1), recovery_value=60.0, excercise_data_point=550.0),
+        DummyRecord(date=start + timedelta(days=2), nutrition_data_point=1900.0),
+    ]
+    dips = DipDetectionResult(large=[_mk_dip(start + timedelta(days=1), "large")], persistent=[], all=[])
+
+    out = build_timeseries(records, dips, BASELINES)
+
+    assert [d["date"] for d in out] == ["2026-01-01", "2026-01-02", "2026-01-03"]
+    assert [d["dip_kind"] for d in out] == ["none", "large", "none"]
+    assert [d["is_dip"] for d in out] == [False, True, False]
+
+    # Sleep takes the strongest of its fields: |5-8|/1 = 3
+    assert out[0]["factor_abs_z"]["sleep"] == pytest.approx(3.0)
+    assert out[0]["factor_abnormal"]["sleep"] is True
+    assert out[1]["factor_abs_z"]["exercise"] == pytest.approx(1.0)
+    assert out[1]["factor_abnormal"]["exercise"] is False
+
+    # Missing values and zero-variance baselines off the mean score as 0 / not abnormal
+    assert out[1]["factor_abs_z"]["sleep"] == 0.0
+    assert out[2]["factor_abs_z"]["nutrition"] == 0.0
+    assert out[2]["factor_abnormal"]["nutrition"] is False
+
+
+def test_build_timeseries_dates_with_gaps_are_preserved():
+    days = [date(2026, 1, 1), date(2026, 1, 2), date(2026, 1, 5)]
+    records = [DummyRecord(date=d, recovery_value=80.0) for d in days]
+    dips = DipDetectionResult(large=[], persistent=[], all=[])
+
+    out = build_timeseries(records, dips, BASELINES)
+
+    assert [d["date"] for d in out] == [d.isoformat() for d in days]
+
+
+def test_timeseries_columns_expand_to_same_rows():
+    start = date(2026, 1, 1)
+    records = [
+        DummyRecord(date=start + timedelta(days=i), recovery_value=70.0 + i, sleep_duration=6.0 + i)
+        for i in range(4)
+    ]
+    dips = DipDetectionResult(large=[], persistent=[_mk_dip(start, "persistent")], all=[])
+
+    columns = build_timeseries_columns(records, dips, BASELINES)
+
+    assert columns["date"] == ["2026-01-01", "2026-01-02", "2026-01-03", "2026-01-04"]
+    assert columns["dip_kind"] == ["persistent", "none", "none", "none"]
+    assert columns["excercise_data_point"] == [None] * 4
+    assert set(columns["factor_abs_z"]) == {"sleep", "exercise", "nutrition"}
+    assert timeseries_rows(columns) == build_timeseries(records, dips, BASELINES)
+
+
+def test_iso_dates_falls_back_on_duplicates_and_gaps():
+    start = date(2026, 1, 1)
+    contiguous = [DummyRecord(date=start + timedelta(days=i)) for i in range(3)]
+    # Same span as a gap-free window (2 days over 3 rows), but Jan 2 is missing
+    dup_and_gap = [DummyRecord(date=d) for d in (start, start, start + timedelta(days=2))]
+
+    assert _iso_dates(contiguous) == ["2026-01-01", "2026-01-02", "2026-01-03"]
+    assert _iso_dates(dup_and_gap) == ["2026-01-01", "2026-01-01", "2026-01-03"]
@@ -0,0 +1,273 @@
+import numpy as np
+import pytest
+from dataclasses import asdict, dataclass
+from datetime import date
+from typing import Optional
+
+from app.domain.config import AnalysisAssumptions
+from app.services.analytics.baselines import BaselineStats, RollingStats, records_to_matrix
+from app.services.analytics.dips import DipEvent, DipDetectionResult
+from app.services.analytics.insights import (
+    band_from_z_batch,
+    build_insight,
+    build_insights,
+    extract_latest_values,
+    insight_to_dict,
+    latest_values_from_matrix,
+    _dominant_factor_insight,
+    _factor_kernel,
+    _factor_kernel_loop,
+    _stability_from_std,
+)
+from app.services.analytics.pareto_calculation import FactorAttribution, ParetoResult
+
+
+@dataclass
+class DummyRecord:
+    date: date
+    recovery_value: Optional[float] = None
+    sleep_duration: Optional[float] = None
+    sleep_consistency: Optional[float] = None
+    excercise_data_point: Optional[float] = None
+    nutrition_data_point: Optional[float] = None
+
+
+BASELINES = {
+    "recovery_value": BaselineStats(mean=80.0, std=5.0, n=30),
+    "sleep_duration": BaselineStats(mean=8.0, std=0.5, n=30),       # stable (cv ~0.06)
+    "sleep_consistency": BaselineStats(mean=0.8, std=0.2, n=30),    # volatile (cv 0.25)
+    "excercise_data_point": BaselineStats(mean=500.0, std=50.0, n=30),
+    "nutrition_data_point": BaselineStats(mean=2000.0, std=0.0, n=30),
+}
+
+
+def _dips(n: int) -> DipDetectionResult:
+    events = [
+        DipEvent(date=date(2026, 1, i + 1), recovery_value=60.0, baseline_mean=80.0, z=-4.0, magnitude=20.0, kind="large")
+        for i in range(n)
+    ]
+    return DipDetectionResult.from_events(events)
+
+
+def _pareto(primary: str, runner_up: Optional[str] = None) -> ParetoResult:
+    ranked = [FactorAttribution(key=primary, percent=80.0, raw_score=4.0, occurrences=4, avg_abs_z=2.0)]
+    if runner_up:
+        ranked.append(FactorAttribution(key=runner_up, percent=20.0, raw_score=1.0, occurrences=1, avg_abs_z=1.5))
+    return ParetoResult(factors_ranked=ranked, dominant_key=primary, meta={})
+
+
+def test_build_insight_uses_strongest_field_for_state_and_most_volatile_for_stability():
+    # sleep_duration z = (6.5-8)/0.5 = -3 outweighs sleep_consistency z = (0.9-0.8)/0.2 = +0.5
+    latest = {"sleep_duration": 6.5, "sleep_consistency": 0.9}
+
+    insight = build_insight(
+        pareto=_pareto("sleep", runner_up="exercise"),
+        dips_result=_dips(5),
+        recovery_stable=False,
+        baselines=BASELINES,
+        latest_values=latest,
+        constants=AnalysisAssumptions(),
+    )
+
+    assert insight.title == "Primary dip-associated factor: Sleep"
+    assert insight.current_state == {"sleep": "below_normal"}
+    assert insight.stability == {"sleep": "volatile"}
+    assert insight.signal_strength == "Medium"
+    assert "more sensitive to sleep than to exercise" in insight.body
+    assert "Current state: sleep is below your normal range." in insight.body
+
+
+def test_build_insight_unknown_state_when_latest_value_is_unscorable():
+    # Zero-variance baseline and a value off the mean -> no z-score
+    insight = build_insight(
+        pareto=_pareto("nutrition"),
+        dips_result=_dips(1),
+        recovery_stable=False,
+        baselines=BASELINES,
+        latest_values={"nutrition_data_point": 1900.0},
+        constants=AnalysisAssumptions(),
+        resources_by_factor={"nutrition": [{"title": "Fueling basics"}]},
+    )
+
+    assert insight.current_state == {"nutrition": "unknown"}
+    assert insight.stability == {"nutrition": "stable"}
+    assert "data is unavailable or insufficient" in insight.body
+    assert insight.resources == {"nutrition": [{"title": "Fueling basics"}]}
+
+
+def test_build_insight_reuses_cached_insight_for_identical_inputs():
+    kwargs = dict(
+        pareto=_pareto("sleep"),
+        dips_result=_dips(6),
+        recovery_stable=False,
+        baselines=BASELINES,
+        latest_values={"sleep_duration": 7.0, "sleep_consistency": 0.6},
+        constants=AnalysisAssumptions(),
+    )
+
+    first = build_insight(**kwargs)
+    hits = _dominant_factor_insight.cache_info().hits
+    second = build_insight(**kwargs)
+    assert _dominant_factor_insight.cache_info().hits == hits + 1
+    assert second == first and second is not first
+
+    # Each caller gets its own dicts; mutating one never reaches the cache
+    second.current_state["sleep"] = "changed"
+    assert build_insight(**kwargs).current_state == {"sleep": "below_normal"}
+
+    # Any input the message depends on changes the cache key
+    moved = build_insight(**{**kwargs, "latest_values": {"sleep_duration": 8.0, "sleep_consistency": 0.8}})
+    assert moved.current_state == {"sleep": "within_normal"}
+    assert first.current_state == {"sleep": "below_normal"}
+
+    # Resources are attached per call and never leak into the cached instance
+    with_resources = build_insight(**kwargs, resources_by_factor={"sleep": [{"title": "Sleep hygiene"}]})
+    assert with_resources.resources == {"sleep": [{"title": "Sleep hygiene"}]}
+    assert build_insight(**kwargs).resources is None
+
+
+def test_build_insight_cache_follows_rolling_stats_values():
+    rolling = RollingStats()
+    for v in (7.0, 7.1, 6.9, 7.0):
+        rolling.push(v)
+    kwargs = dict(
+        pareto=_pareto("sleep"),
+        dips_result=_dips(6),
+        recovery_stable=False,
+        baselines={"sleep_duration": rolling},
+        latest_values={"sleep_duration": 7.0},
+        constants=AnalysisAssumptions(),
+    )
+
+    before = build_insight(**kwargs)
+    assert before.stability == {"sleep": "stable"}
+
+    # Same object, new values: must not be served the stale cached insight
+    rolling.push(12.0)
+    after = build_insight(**kwargs)
+    assert after is not before
+    assert after.stability == {"sleep": "volatile"}
+
+
+def test_insight_to_dict_matches_asdict():
+    insight = build_insight(
+        pareto=_pareto("sleep", runner_up="exercise"),
+        dips_result=_dips(6),
+        recovery_stable=False,
+        baselines=BASELINES,
+        latest_values={"sleep_duration": 7.0},
+        constants=AnalysisAssumptions(),
+        resources_by_factor={"sleep": [{"title": "Sleep hygiene"}]},
+    )
+
+    out = insight_to_dict(insight)
+    assert out == asdict(insight)
+
+    # Nested payload is the caller's: mutating it leaves the Insight untouched
+    out["resources"]["sleep"][0]["title"] = "changed"
+    out["current_state"]["sleep"] = "changed"
+    assert insight.resources == {"sleep": [{"title": "Sleep hygiene"}]}
+    assert insight.current_state["sleep"] != "changed"
+
+
+def test_extract_latest_values_walks_back_to_most_recent_non_null():
+    records = [
+        DummyRecord(date=date(2026, 1, 1), recovery_value=70.0, sleep_duration=7.0, nutrition_data_point=1800.0),
+        DummyRecord(date=date(2026, 1, 2), recovery_value=None, sleep_duration=8.0),
+        DummyRecord(date=date(2026, 1, 3), recovery_value=75.0),
+    ]
+
+    latest = extract_latest_values(records)
+
+    assert latest["recovery_value"] == 75.0
+    assert latest["sleep_duration"] == 8.0
+    assert latest["nutrition_data_point"] == 1800.0
+    assert latest["sleep_consistency"] is None
+    assert latest["excercise_data_point"] is None
+
+    assert latest_values_from_matrix(records_to_matrix(records)) == latest
+
+
+def test_stability_from_std_accepts_rolling_stats():
+    rolling = RollingStats()
+    assert _stability_from_std(rolling) == "unknown"
+
+    for v in (10.0, 10.5, 9.5, 10.0):
+        rolling.push(v)
+    assert _stability_from_std(rolling) == "stable"
+
+    rolling.push(20.0)
+    assert _stability_from_std(rolling) == "volatile"
+
+
+def test_band_from_z_batch_matches_scalar_cutoffs():
+    zs = np.array([-2.0, -0.75, -0.7499, 0.0, 0.7499, 0.75, 3.0, np.nan])
+
+    assert band_from_z_batch(zs).tolist() == [
+        "below_normal",
+        "below_normal",
+        "within_normal",
+        "within_normal",
+        "within_normal",
+        "above_normal",
+        "above_normal",
+        "unknown",
+    ]
+
+
+def test_factor_kernel_matches_loop_and_skips_unscorable_fields():
+    nan = np.nan
+    means = np.array([8.0, 0.8, nan, 2000.0])
+    stds = np.array([0.5, 0.2, nan, 0.0])
+    ns = np.array([30, 30, 0, 30], dtype=np.int64)
+    values = np.array([7.0, 0.6, 5.0, 2100.0])  # z: -2.0, -1.0, missing, off-mean zero-variance
+
+    expected = _factor_kernel_loop(means, stds, ns, values)
+    assert expected == (-2.0, True, True)
+    assert _factor_kernel(means, stds, ns, values) == expected
+
+    best_z, any_volatile, any_stable = _factor_kernel(means[2:3], stds[2:3], ns[2:3], values[2:3])
+    assert np.isnan(best_z)
+    assert (any_volatile, any_stable) == (False, False)
+
+
+def test_build_insights_matches_build_insight_per_item():
+    stable_pareto = ParetoResult(factors_ranked=[], dominant_key=None, meta={"reason": "no_dips"})
+    cases = [
+        (_pareto("sleep", runner_up="exercise"), _dips(6), False, {"sleep_duration": 7.0, "sleep_consistency": 0.6}),
+        (_pareto("nutrition"), _dips(1), False, {"nutrition_data_point": 1900.0}),
+        (_pareto("exercise"), _dips(12), False, {"excercise_data_point": 620.0}),
+        (_pareto("sleep"), _dips(2), False, {}),
+        (stable_pareto, _dips(0), False, {}),
+        (_pareto("sleep"), _dips(3), True, {}),
+    ]
+    resources = {"sleep": [{"title": "Sleep hygiene"}]}
+    constants = AnalysisAssumptions()
+
+    batch = build_insights(
+        paretos=[c[0] for c in cases],
+        dips_results=[c[1] for c in cases],
+        recovery_stable=[c[2] for c in cases],
+        baselines=[BASELINES] * len(cases),
+        latest_values=[c[3] for c in cases],
+        constants=constants,
+        resources_by_factor=resources,
+    )
+
+    expected = [
+        build_insight(p, d, st, BASELINES, lv, constants, resources_by_factor=resources)
+        for p, d, st, lv in cases
+    ]
+    assert batch == expected
+
+
+def test_build_insights_rejects_mismatched_lengths():
+    with pytest.raises(ValueError):
+        build_insights(
+            paretos=[_pareto("sleep"), _pareto("exercise")],
+            dips_results=[_dips(3)],
+            recovery_stable=[False, False],
+            baselines=[BASELINES, BASELINES],
+            latest_values=[{}, {}],
+            constants=AnalysisAssumptions(),
+        )
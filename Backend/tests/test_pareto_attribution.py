@@ -1,10 +1,21 @@
+import numpy as np
 import pytest
 from dataclasses import dataclass
 from datetime import date, timedelta
 from typing import Optional, List
 
 from app.services.analytics.baselines import BaselineStats
-from app.services.analytics.pareto_calculation import compute_pareto_attribution, AttributionThresholds
+from app.services.analytics.pareto_calculation import (
+    DEFAULT_DRIVERS,
+    AttributionThresholds,
+    compute_pareto_attribution,
+    factor_strengths,
+    _count_consistent_windows,
+    _dip_window_evidence_loop,
+    _dip_window_evidence_numpy,
+    _factor_abnormality,
+    _rows_by_day,
+)
 from app.services.analytics.dips import DipEvent, DipDetectionResult
 
 
@@ -78,6 +89,7 @@ def test_pareto_returns_insufficient_history_gate():
     assert out.dominant_key is None
     assert out.factors_ranked == []
     assert out.meta.get("reason") == "insufficient_history"
+    assert out.reason == "insufficient_history"
 
 
 def test_pareto_returns_no_dips_gate():
@@ -97,6 +109,7 @@ def test_pareto_returns_no_dips_gate():
     assert out.dominant_key is None
     assert out.factors_ranked == []
     assert out.meta.get("reason") == "no_dips"
+    assert out.reason == "no_dips"
     assert out.meta.get("dip_count") == 0
 
 
@@ -201,3 +214,90 @@ def test_pareto_direction_filter_blocks_sleep_if_sleep_is_high_not_low():
     assert out.dominant_key is None
     assert out.factors_ranked == []
     assert out.meta.get("reason") == "no_explanatory_signal"
+    assert out.reason == "no_explanatory_signal"
+
+
+def test_factor_strengths_takes_max_abs_z_per_factor_and_ignores_padding():
+    # columns: recovery, sleep_duration, sleep_consistency, exercise, nutrition
+    abs_z = np.array(
+        [
+            [9.0, 1.0, 2.5, 0.5, np.nan],
+            [9.0, np.nan, np.nan, np.nan, 3.0],
+        ]
+    )
+
+    out = factor_strengths(abs_z)  # DEFAULT_DRIVERS order: sleep, exercise, nutrition
+
+    assert out.shape == (2, 3)
+    assert out[0].tolist()[:2] == [2.5, 0.5]
+    assert np.isnan(out[0, 2])
+    assert np.isnan(out[1, 0]) and np.isnan(out[1, 1])
+    assert out[1, 2] == 3.0
+
+
+def test_factor_abnormality_applies_direction_filter_per_factor():
+    baselines = {
+        "sleep_duration": BaselineStats(mean=8.0, std=1.0, n=10),
+        "sleep_consistency": BaselineStats(mean=0.8, std=0.1, n=10),
+        "excercise_data_point": BaselineStats(mean=100.0, std=10.0, n=10),
+        "nutrition_data_point": BaselineStats(mean=2000.0, std=100.0, n=10),
+    }
+    start = date(2026, 1, 1)
+    records = [
+        # sleep low (harmful), exercise high (harmful), nutrition high (benign)
+        DummyRecord(start, sleep_duration=6.0, excercise_data_point=130.0, nutrition_data_point=2300.0),
+        # sleep high (benign), exercise low (benign), nutrition low (harmful)
+        DummyRecord(start + timedelta(days=1), sleep_duration=10.0, excercise_data_point=70.0, nutrition_data_point=1700.0),
+        # strongest sleep field is consistency (z=-3) even though duration is high
+        DummyRecord(start + timedelta(days=2), sleep_duration=9.0, sleep_consistency=0.5),
+        # below threshold / missing
+        DummyRecord(start + timedelta(days=3), sleep_duration=7.0),
+    ]
+
+    abnormal, strength = _factor_abnormality(
+        records, DEFAULT_DRIVERS, baselines, AttributionThresholds(abnormal_abs_z=1.25)
+    )
+
+    # DEFAULT_DRIVERS order: sleep, exercise, nutrition
+    assert abnormal.tolist() == [
+        [True, True, False],
+        [False, False, True],
+        [True, False, False],
+        [False, False, False],
+    ]
+    assert strength[0].tolist() == pytest.approx([2.0, 3.0, 0.0])
+    assert strength[2, 0] == pytest.approx(3.0)
+    assert strength[3].tolist() == [0.0, 0.0, 0.0]
+
+
+def test_rows_by_day_marks_gaps_and_keeps_last_duplicate():
+    # offsets of records 0..4: day 0, day 2, day 2 again, day 5, day 3
+    rows = _rows_by_day(np.array([0, 2, 2, 5, 3]))
+
+    assert rows.tolist() == [0, -1, 2, 4, -1, 3]
+
+
+def test_count_consistent_windows_anchors_non_overlapping_windows_on_dips():
+    # 7-day windows anchored at day 0 (0..6), day 10 (10..16), day 20 (20..26)
+    offsets = np.array([0, 3, 6, 10, 12, 20])
+    contributed = np.array([False, False, True, False, False, True])
+
+    assert _count_consistent_windows(offsets, contributed, days_window=7) == 2
+    assert _count_consistent_windows(offsets, np.zeros(6, dtype=bool), days_window=7) == 0
+    assert _count_consistent_windows(offsets[:0], contributed[:0], days_window=7) == 0
+
+
+@pytest.mark.parametrize("max_lag_days", [0, 1, 3])
+def test_dip_window_evidence_numpy_matches_loop(max_lag_days):
+    rng = np.random.default_rng(0)
+    offsets = np.sort(rng.choice(80, size=60, replace=False))  # days with a record
+    row_of_day = _rows_by_day(offsets)
+    abnormal = rng.random((60, 3)) < 0.2
+    strengths = np.where(abnormal, rng.uniform(1.25, 4.0, (60, 3)), 0.0)
+    dip_offsets = np.array([0, 2, 17, 40, 41, 79, 85])  # includes a dip past the last record
+
+    loop = _dip_window_evidence_loop(dip_offsets, row_of_day, abnormal, strengths, max_lag_days)
+    vec = _dip_window_evidence_numpy(dip_offsets, row_of_day, abnormal, strengths, max_lag_days)
+
+    assert np.array_equal(loop[0], vec[0])
+    assert np.array_equal(loop[1], vec[1])
@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import List, Optional
+
+from app.services.analytics._kernels import _welford_loop, welford
+from app.services.analytics.stability import _sliding_ratio, is_stable_recovery, recovery_stats
+
+
+@dataclass
+class DummyRecord:
+    date: date
+    recovery_value: Optional[float] = None
+
+
+@dataclass
+class DummyAssumptions:
+    min_history_days: int = 5
+    min_observations: int = 3
+    baseline_days_window: int = 14
+
+
+def _mk_records(values: List[Optional[float]]) -> List[DummyRecord]:
+    start = date(2026, 1, 1)
+    return [DummyRecord(date=start + timedelta(days=i), recovery_value=v) for i, v in enumerate(values)]
+
+
+@pytest.mark.parametrize("kernel", [_welford_loop, welford])
+def test_welford_matches_numpy_population_stats_and_skips_nan(kernel):
+    xs = np.array([80.0, 82.5, np.nan, 79.0, 81.0, np.nan, 80.5])
+
+    mean, std, n = kernel(xs)
+
+    assert n == 5
+    assert mean == pytest.approx(np.nanmean(xs))
+    assert std == pytest.approx(np.nanstd(xs))
+
+    empty_mean, empty_std, empty_n = kernel(np.array([np.nan]))
+    assert empty_n == 0 and np.isnan(empty_mean) and np.isnan(empty_std)
+
+
+@pytest.mark.parametrize("kernel", [_welford_loop, welford])
+def test_welford_tight_cluster_keeps_nonzero_nonnegative_std(kernel):
+    # Large offset + tiny spread: sum(x*x)/n - mean**2 is dominated by rounding here
+    rng = np.random.default_rng(3)
+    xs = 1e8 + rng.normal(0.0, 1e-3, size=500)
+
+    mean, std, n = kernel(xs)
+
+    assert n == 500
+    assert std >= 0.0
+    assert std == pytest.approx(np.std(xs), rel=1e-3)
+
+
+def test_is_stable_recovery_derives_baseline_from_records_when_none_given():
+    records = _mk_records([80.0, 81.0, None, 79.5, 80.5, 80.0])
+
+    out = is_stable_recovery(records, None, dip_count=0, constants=DummyAssumptions())
+
+    stats = recovery_stats(records)
+    assert stats.n == 5
+    assert stats.mean == pytest.approx(80.2)
+    assert stats.std == pytest.approx(np.std([80.0, 81.0, 79.5, 80.5, 80.0]))
+    assert out.stable is True
+    assert out.meta["recovery_mean"] == pytest.approx(80.2)
+
+
+def test_is_stable_recovery_reports_missing_baseline():
+    records = _mk_records([None] * 6)
+
+    out = is_stable_recovery(records, None, dip_count=0, constants=DummyAssumptions())
+
+    assert out.stable is False
+    assert out.meta == {"reason": "missing_recovery_baseline"}
+
+
+def test_recovery_stats_window_uses_only_trailing_records():
+    records = _mk_records([10.0, 20.0, 80.0, None, 82.0])
+
+    stats = recovery_stats(records, window=3)
+
+    assert stats.n == 2
+    assert stats.mean == pytest.approx(81.0)
+    assert recovery_stats(records, window=50) == recovery_stats(records)
+
+
+def test_sliding_ratio_is_max_over_windows():
+    xs = np.array([80.0, 80.0, 80.0, 60.0, 80.0, 80.0, 80.0, 80.0])
+
+    assert _sliding_ratio(xs, window=3) == pytest.approx(80.0 / 60.0)
+    assert _sliding_ratio(np.full(8, 80.0), window=3) == 1.0
+    assert _sliding_ratio(xs[:2], window=3) is None
+
+
+def test_is_stable_recovery_flags_local_swing_that_global_cv_misses():
+    records = _mk_records([80.0] * 15 + [60.0] + [80.0] * 15)
+
+    out = is_stable_recovery(records, None, dip_count=0, constants=DummyAssumptions())
+
+    assert out.meta["stable_by_variance"] is True
+    assert out.meta["stable_by_window"] is False
+    assert out.meta["max_window_ratio"] == pytest.approx(80.0 / 60.0)
+    assert out.stable is False
+
+
+def test_swing_gate_uses_the_precomputed_baseline_window():
+    # The swing is older than the trailing 14-day baseline window
+    records = _mk_records([80.0] * 5 + [60.0] + [80.0] * 20)
+    baseline = recovery_stats(records, window=14)
+    values = np.array([r.recovery_value for r in records])
+
+    out = is_stable_recovery(records, baseline, dip_count=0, constants=DummyAssumptions())
+    from_column = is_stable_recovery(
+        records, baseline, dip_count=0, constants=DummyAssumptions(), recovery_values=values
+    )
+
+    assert out.meta["stable_by_window"] is True
+    assert out.meta["max_window_ratio"] == 1.0
+    assert out.stable is True
+    assert from_column == out
@@ -0,0 +1,31 @@
+import pytest
+
+from app.services.ingest import store
+
+
+class _NoItemsIjson:
+    """Stand-in for ijson: the top-level check must reject the file before items() runs."""
+
+    @staticmethod
+    def items(*args, **kwargs):
+        raise AssertionError("items() should not be reached for a non-list seed")
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_load_seed_rejects_non_list_top_level(tmp_path, monkeypatch, streamed):
+    path = tmp_path / f"seed_streamed_{streamed}.json"
+    path.write_text(' \n{"date": "2024-01-01", "recovery_value": 80.0}')
+    if streamed:
+        monkeypatch.setattr(store, "ijson", _NoItemsIjson)
+        monkeypatch.setattr(store, "_STREAM_MIN_BYTES", 0)
+
+    with pytest.raises(ValueError, match="JSON list of daily records"):
+        store._load_seed(str(path), path.stat().st_mtime_ns)
+
+
+def test_opens_json_list_skips_leading_whitespace_and_rewinds(tmp_path):
+    path = tmp_path / "seed.json"
+    path.write_bytes(b"\n  [\n]")
+    with path.open("rb") as f:
+        assert store._opens_json_list(f)
+        assert f.tell() == 0
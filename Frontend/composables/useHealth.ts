@@ -45,6 +45,50 @@ export type Timeseries = {
   days: TimeseriesDay[]
 }
 
+// Wire format: one array per field (see backend evidence.build_timeseries_columns)
+export type TimeseriesColumns = {
+  user_id: string
+  days_window: number
+  layout: 'columns'
+  columns: {
+    date: string[]
+    recovery_value: Array<number | null>
+    sleep_duration: Array<number | null>
+    sleep_consistency: Array<number | null>
+    excercise_data_point: Array<number | null>
+    nutrition_data_point: Array<number | null>
+    is_dip: boolean[]
+    dip_kind: Array<TimeseriesDay['dip_kind']>
+    factor_abnormal: Record<string, boolean[]>
+    factor_abs_z: Record<string, number[]>
+  }
+}
+
+export type Dashboard = {
+  summary: Summary
+  timeseries: Timeseries
+}
+
+const pick = <T>(cols: Record<string, T[]>, i: number): Record<string, T> =>
+  Object.fromEntries(Object.entries(cols).map(([k, v]) => [k, v[i]]))
+
+export function expandTimeseries(t: TimeseriesColumns): Timeseries {
+  const c = t.columns
+  const days: TimeseriesDay[] = c.date.map((date, i) => ({
+    date,
+    recovery_value: c.recovery_value[i],
+    sleep_duration: c.sleep_duration[i],
+    sleep_consistency: c.sleep_consistency[i],
+    excercise_data_point: c.excercise_data_point[i],
+    nutrition_data_point: c.nutrition_data_point[i],
+    is_dip: c.is_dip[i],
+    dip_kind: c.dip_kind[i],
+    factor_abnormal: pick(c.factor_abnormal, i),
+    factor_abs_z: pick(c.factor_abs_z, i)
+  }))
+  return { user_id: t.user_id, days_window: t.days_window, days }
+}
+
 export function useHealthApi() {
   const config = useRuntimeConfig()
   const apiBase = (config.public.apiBase as string) || 'http://127.0.0.1:8000'
@@ -56,10 +100,18 @@ export function useHealthApi() {
   }
 
   const getTimeseries = async (userId: string, windowDays: number): Promise<Timeseries> => {
-    return await $fetch<Timeseries>(`${apiBase}/health/timeseries`, {
+    const t = await $fetch<TimeseriesColumns>(`${apiBase}/health/timeseries`, {
+      query: { user_id: userId, days_window: windowDays }
+    })
+    return expandTimeseries(t)
+  }
+
+  const getDashboard = async (userId: string, windowDays: number): Promise<Dashboard> => {
+    const d = await $fetch<{ summary: Summary, timeseries: TimeseriesColumns }>(`${apiBase}/health/dashboard`, {
       query: { user_id: userId, days_window: windowDays }
     })
+    return { summary: d.summary, timeseries: expandTimeseries(d.timeseries) }
   }
 
-  return { getSummary, getTimeseries }
+  return { getSummary, getTimeseries, getDashboard }
 }
\ No newline at end of file